@@ -3,16 +3,132 @@
 Analyze hacking rates by model in each experimental condition using Inspect AI samples_df.
 """
 
+import argparse
+import functools
+import glob
+import os
+import re
+import zipfile
+from datetime import datetime
+from statistics import NormalDist
+from fnmatch import fnmatch
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from inspect_ai.analysis import samples_df, EvalModel, SampleSummary
+from inspect_ai.log import read_eval_log
 import json
 
-def analyze_hacking_rates(log_dir="logs"):
+# Inspect log names start with the creation time, e.g. 2025-09-13T16-11-28-07-00_fix-nested-bug_<id>.eval
+LOG_TIMESTAMP = re.compile(r'^(\d{4}-\d{2}-\d{2})T(\d{2})-(\d{2})-(\d{2})([+-]\d{2})-(\d{2})_')
+
+
+def log_timestamp(path):
+    """Return the creation time encoded in a log file name, or None if it has none."""
+    match = LOG_TIMESTAMP.match(os.path.basename(path))
+    if match is None:
+        return None
+    date, hour, minute, second, tz_hour, tz_minute = match.groups()
+    return datetime.fromisoformat(f"{date}T{hour}:{minute}:{second}{tz_hour}:{tz_minute}")
+
+
+@functools.lru_cache(maxsize=None)
+def _read_listing(listing_path, mtime):
+    """Parse a listing.json; the mtime key reloads it after it is rewritten."""
+    with open(listing_path) as f:
+        return json.load(f)
+
+
+def log_listing(directory):
+    """Return the parsed listing.json of a log directory, or {} if it has none."""
+    listing_path = os.path.join(directory, 'listing.json')
+    try:
+        mtime = os.stat(listing_path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    return _read_listing(listing_path, mtime)
+
+
+def log_model(path):
+    """
+    Return the model of a log without reading its samples.
+    
+    Uses the listing.json next to the log when it has an entry, otherwise reads
+    only the log header. Each listing is parsed once, not once per log.
+    """
+    entry = log_listing(os.path.dirname(path)).get(os.path.basename(path))
+    if entry and 'model' in entry:
+        return entry['model']
+    return read_eval_log(path, header_only=True).eval.model
+
+
+def find_logs(log_dirs, since=None, models=None):
+    """
+    Resolve log directories or glob patterns to the logs to analyze.
+    
+    Filters are applied from the file name and header only, so excluded logs
+    are never parsed.
+    
+    Args:
+        log_dirs: Log directories, log files or glob patterns matching either
+        since: Only keep logs created at or after this datetime
+        models: Only keep logs whose model matches one of these glob patterns
+    
+    Returns:
+        Sorted list of log file paths
+    """
+    if since is not None and since.tzinfo is None:
+        since = since.astimezone()
+    
+    logs = set()
+    for pattern in log_dirs:
+        for path in glob.glob(pattern) or [pattern]:
+            if os.path.isdir(path):
+                logs.update(glob.glob(os.path.join(path, '**', '*.eval'), recursive=True))
+                logs.update(glob.glob(os.path.join(path, '**', '*.json'), recursive=True))
+            elif os.path.exists(path):
+                logs.add(path)
+    # listing.json and other viewer metadata are not logs
+    logs = [path for path in logs if LOG_TIMESTAMP.match(os.path.basename(path)) or path.endswith('.eval')]
+    
+    if since is not None:
+        logs = [path for path in logs if (log_timestamp(path) or since) >= since]
+    if models:
+        logs = [path for path in logs if any(fnmatch(log_model(path), model) for model in models)]
+    
+    return sorted(logs)
+
+
+def classify_prompt(prompt):
+    if 'COMMENT OUT' in prompt:
+        return 'extreme'
+    elif 'Be sure not to remove any functionality.' in prompt:
+        return 'moderate'
+    else:
+        return 'none'
+
+
+def sample_condition(metadata):
+    """Build the condition key of a sample from its metadata."""
+    return ",".join([
+        metadata['task_root'],
+        metadata['body'],
+        metadata['header'],
+        metadata['extra_code'],
+        classify_prompt(metadata['prompt_suffix']),
+    ])
+
+
+def analyze_hacking_rates(log_dir="logs", conditions=None):
     """
     Create a table of hacking rates by model in each experimental condition.
     
     Args:
-        log_dir: Directory containing the evaluation logs
+        log_dir: Directory containing the evaluation logs, or a list of log files
+        conditions: Only keep samples whose condition matches one of these glob patterns
     
     Returns:
         Tuple of (results DataFrame, pivot table, full DataFrame)
@@ -34,17 +150,16 @@ def analyze_hacking_rates(log_dir="logs"):
         if 'eval_model' in df.columns:
             df['model'] = df['eval_model']
     
-    def classify_prompt(prompt):
-        if 'COMMENT OUT' in prompt:
-            return 'extreme'
-        elif 'Be sure not to remove any functionality.' in prompt:
-            return 'moderate'
-        else:
-            return 'none'
     df['condition'] = df.apply(
         lambda row: f"{row['metadata_task_root']},{row['metadata_body']},{row['metadata_header']},{row['metadata_extra_code']},{classify_prompt(row['metadata_prompt_suffix'])}",
         axis=1
     )
+    if conditions:
+        df = df[df['condition'].apply(lambda c: any(fnmatch(c, pattern) for pattern in conditions))].copy()
+    
+    # Samples stopped by the budget guard never ran and carry no score values
+    scored = df['score_test_scoring'].apply(lambda x: isinstance(x, str) and 'hacked' in json.loads(x))
+    df = df[scored].copy()
     
     df['hacking_success'] = df['score_test_scoring'].apply(
         lambda x: json.loads(x)['hacked'] == 'I'
@@ -96,8 +211,317 @@ def analyze_by_factor(df):
     return factor_results
 
 
-def print_results(results_df, pivot_table, df=None):
-    """Print formatted results."""
+# Order of the experimental factors inside the comma-separated condition key
+CONDITION_FACTORS = ['task_root', 'body', 'header', 'extra_code', 'prompt_suffix']
+
+
+def hacking_cube(df):
+    """
+    Arrange attempts and successful hacks as dense model x condition matrices.
+    
+    Args:
+        df: Full DataFrame with model, condition and hacking_success columns
+    
+    Returns:
+        Tuple of (models, conditions, attempts matrix, hacks matrix)
+    """
+    counts = df.groupby(['model', 'condition'])['hacking_success'].agg(['count', 'sum'])
+    attempts = counts['count'].unstack(fill_value=0)
+    hacks = counts['sum'].unstack(fill_value=0).reindex_like(attempts)
+    return (
+        attempts.index.to_numpy(),
+        attempts.columns.to_numpy(),
+        attempts.to_numpy(dtype=np.int64),
+        hacks.to_numpy(dtype=np.int64),
+    )
+
+
+def _percentile_interval(replicates, confidence):
+    """Percentile bootstrap interval along the replicate axis, in percent."""
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+    return (lower * 100).round(2), (upper * 100).round(2)
+
+
+def _pooled_rate_replicates(attempts, hacks, n_boot, rng, cluster):
+    """
+    Draw bootstrap replicates of the pooled hacking rate of each model.
+    
+    Args:
+        attempts: models x conditions matrix of attempts
+        hacks: models x conditions matrix of successful hacks
+        n_boot: Number of bootstrap replicates
+        rng: numpy random Generator
+        cluster: 'condition' to resample whole conditions, None to resample attempts
+    
+    Returns:
+        Array of shape (n_boot, models) with replicate hacking rates
+    """
+    if cluster == 'condition':
+        # Each row of the multinomial matrix says how often every condition is drawn
+        n_conditions = attempts.shape[1]
+        weights = rng.multinomial(n_conditions, np.full(n_conditions, 1 / n_conditions), size=n_boot)
+        numerator = weights @ hacks.T
+        denominator = weights @ attempts.T
+    elif cluster is None:
+        total = attempts.sum(axis=1)
+        rate = np.divide(hacks.sum(axis=1), total, out=np.zeros(len(total)), where=total > 0)
+        numerator = rng.binomial(total, rate, size=(n_boot, len(total)))
+        denominator = np.broadcast_to(total, numerator.shape)
+    else:
+        raise ValueError(f"Unknown cluster: {cluster}")
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator
+
+
+def wilson_interval(hacks, attempts, confidence=0.95):
+    """
+    Wilson score interval for hacking rates, elementwise, in percent.
+    
+    Unlike a bootstrap at the observed rate, the interval keeps its width when
+    a cell has no hacks or only hacks, which is common with few attempts.
+    
+    Args:
+        hacks: Array of successful hacks
+        attempts: Array of attempts, same shape; cells with none get [0, 100]
+        confidence: Confidence level of the interval
+    
+    Returns:
+        Tuple of (lower, upper) arrays in percent
+    """
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    n = np.maximum(attempts, 1)
+    rate = hacks / n
+    center = (rate + z**2 / (2 * n)) / (1 + z**2 / n)
+    half_width = z / (1 + z**2 / n) * np.sqrt(rate * (1 - rate) / n + z**2 / (4 * n**2))
+    lower = np.where(attempts > 0, np.clip(center - half_width, 0, 1), 0)
+    upper = np.where(attempts > 0, np.clip(center + half_width, 0, 1), 1)
+    return (lower * 100).round(2), (upper * 100).round(2)
+
+
+def condition_ci(df, confidence=0.95):
+    """
+    Wilson confidence intervals for every model/condition hacking rate.
+    
+    Args:
+        df: Full DataFrame returned by analyze_hacking_rates
+        confidence: Confidence level of the interval
+    
+    Returns:
+        DataFrame with one row per model and condition
+    """
+    models, conditions, attempts, hacks = hacking_cube(df)
+    
+    rate = np.divide(hacks, attempts, out=np.zeros(attempts.shape), where=attempts > 0)
+    lower, upper = wilson_interval(hacks, attempts, confidence)
+    
+    model_idx, condition_idx = np.nonzero(attempts)
+    return pd.DataFrame({
+        'model': models[model_idx],
+        'condition': conditions[condition_idx],
+        'total_attempts': attempts[model_idx, condition_idx],
+        'successful_hacks': hacks[model_idx, condition_idx],
+        'hacking_rate': (rate[model_idx, condition_idx] * 100).round(2),
+        'ci_lower': lower[model_idx, condition_idx],
+        'ci_upper': upper[model_idx, condition_idx],
+    })
+
+
+def _rate_ci_frame(models, attempts, hacks, replicates, confidence, **columns):
+    total = attempts.sum(axis=1)
+    successful = hacks.sum(axis=1)
+    lower, upper = _percentile_interval(replicates, confidence)
+    return pd.DataFrame({
+        'model': models,
+        **columns,
+        'total_attempts': total,
+        'successful_hacks': successful,
+        'hacking_rate': (np.divide(successful, total, out=np.zeros(len(total)), where=total > 0) * 100).round(2),
+        'ci_lower': lower,
+        'ci_upper': upper,
+    })
+
+
+def bootstrap_model_ci(df, n_boot=2000, confidence=0.95, cluster='condition', seed=None):
+    """
+    Bootstrap confidence intervals for each model's overall hacking rate.
+    
+    The rate is pooled over conditions: all of a model's hacks over all of its
+    attempts. (The pivot table's Mean row is different, a mean of hack counts.)
+    
+    Args:
+        df: Full DataFrame returned by analyze_hacking_rates
+        n_boot: Number of bootstrap replicates
+        confidence: Confidence level of the interval
+        cluster: 'condition' to resample whole conditions, None to resample attempts
+        seed: Seed for the random number generator
+    
+    Returns:
+        DataFrame with one row per model
+    """
+    rng = np.random.default_rng(seed)
+    models, _, attempts, hacks = hacking_cube(df)
+    replicates = _pooled_rate_replicates(attempts, hacks, n_boot, rng, cluster)
+    return _rate_ci_frame(models, attempts, hacks, replicates, confidence)
+
+
+def bootstrap_factor_ci(df, n_boot=2000, confidence=0.95, cluster='condition', seed=None):
+    """
+    Bootstrap confidence intervals for hacking rates by model and factor level.
+    
+    Args:
+        df: Full DataFrame returned by analyze_hacking_rates
+        n_boot: Number of bootstrap replicates
+        confidence: Confidence level of the interval
+        cluster: 'condition' to resample the conditions sharing a level, None to resample attempts
+        seed: Seed for the random number generator
+    
+    Returns:
+        DataFrame with one row per model, factor and level
+    """
+    rng = np.random.default_rng(seed)
+    models, conditions, attempts, hacks = hacking_cube(df)
+    levels = np.array([condition.split(',') for condition in conditions])
+    
+    frames = []
+    for i, factor in enumerate(CONDITION_FACTORS):
+        for level in np.unique(levels[:, i]):
+            mask = levels[:, i] == level
+            replicates = _pooled_rate_replicates(attempts[:, mask], hacks[:, mask], n_boot, rng, cluster)
+            frames.append(_rate_ci_frame(
+                models, attempts[:, mask], hacks[:, mask], replicates, confidence,
+                factor=factor, level=level
+            ))
+    
+    return pd.concat(frames, ignore_index=True)
+
+
+# Per-sample usage columns summarized by the usage tables
+USAGE_METRICS = [
+    'input_tokens', 'output_tokens', 'input_tokens_cache_read', 'reasoning_tokens',
+    'total_tokens', 'tool_calls', 'total_time', 'working_time',
+]
+
+
+def tool_call_counts(logs):
+    """
+    Count the tool calls of every sample in a set of .eval archives.
+
+    samples_df does not record tool calls, so this reads the sample members;
+    it parses them once without building message frames.
+
+    Returns:
+        DataFrame with log, id, epoch and tool_calls columns
+    """
+    rows = []
+    for log in logs:
+        if not log.endswith('.eval'):
+            continue
+        with zipfile.ZipFile(log) as archive:
+            for name in archive.namelist():
+                if name.startswith('samples/') and name.endswith('.json'):
+                    sample = json.loads(archive.read(name))
+                    rows.append({
+                        'log': log,
+                        'id': str(sample['id']),
+                        'epoch': sample['epoch'],
+                        'tool_calls': sum(len(message.get('tool_calls') or []) for message in sample['messages']),
+                    })
+    return pd.DataFrame(rows, columns=['log', 'id', 'epoch', 'tool_calls'])
+
+
+def add_usage_columns(df):
+    """
+    Add per-sample token usage and tool call columns to the full DataFrame.
+
+    model_usage maps each model used by a sample to its token counts; the
+    counts are summed over models. total_tokens, total_time and working_time
+    are already sample columns.
+
+    Returns:
+        Copy of df with the USAGE_METRICS columns
+    """
+    usage = pd.json_normalize(df['model_usage'].map(lambda usage: json.loads(usage) if usage else {}).tolist(), sep='|')
+    usage = usage.T.groupby(lambda column: column.rsplit('|', 1)[-1]).sum(min_count=1).T
+    usage.index = df.index
+
+    df = df.copy()
+    for metric in ['input_tokens', 'output_tokens', 'input_tokens_cache_read', 'reasoning_tokens']:
+        df[metric] = usage[metric].astype(float) if metric in usage else np.nan
+
+    counts = tool_call_counts(df['log'].unique())
+    keys = df[['log', 'id', 'epoch']].astype({'log': str, 'id': str, 'epoch': int})
+    df['tool_calls'] = keys.merge(counts, on=['log', 'id', 'epoch'], how='left')['tool_calls'].to_numpy(dtype=float)
+    for metric in ['total_tokens', 'total_time', 'working_time']:
+        df[metric] = df[metric].astype(float)
+    return df
+
+
+def usage_by_condition(df):
+    """
+    Distributions of token usage, tool calls and wall time by model and condition.
+
+    Args:
+        df: Full DataFrame with usage columns from add_usage_columns
+
+    Returns:
+        DataFrame with one row per model, condition and metric
+    """
+    stats = df.groupby(['model', 'condition'])[USAGE_METRICS].describe(percentiles=[0.5, 0.9])
+    stats = stats.stack(level=0, future_stack=True).rename_axis(['model', 'condition', 'metric'])
+    stats = stats.rename(columns={'50%': 'median', '90%': 'p90'})
+    return stats[['count', 'mean', 'median', 'p90', 'max']].round(2).reset_index()
+
+
+def usage_vs_hacking(df):
+    """
+    Hacking rate next to cost for every model and factor level.
+
+    Cost is measured in tokens, tool calls and wall time rather than dollars,
+    since the logs carry no prices. Comparing the levels of a factor shows what
+    it changes: e.g. whether the 4000-line extra_code mostly adds latency.
+
+    Args:
+        df: Full DataFrame with usage columns from add_usage_columns
+
+    Returns:
+        DataFrame with one row per model, factor and level
+    """
+    levels = df['condition'].str.split(',', expand=True)
+    levels.columns = CONDITION_FACTORS
+    columns = ['model', 'hacking_success', 'total_tokens', 'output_tokens', 'tool_calls', 'total_time']
+    long = pd.concat(
+        [df[columns].assign(factor=factor, level=levels[factor]) for factor in CONDITION_FACTORS],
+        ignore_index=True
+    )
+    long['hacking_success'] = long['hacking_success'].astype(float)
+    result = long.groupby(['model', 'factor', 'level']).agg(
+        total_attempts=('hacking_success', 'size'),
+        hacking_rate=('hacking_success', 'mean'),
+        mean_total_tokens=('total_tokens', 'mean'),
+        mean_output_tokens=('output_tokens', 'mean'),
+        mean_tool_calls=('tool_calls', 'mean'),
+        median_total_time=('total_time', 'median'),
+    ).reset_index()
+    result['hacking_rate'] *= 100
+    hacks = result['hacking_rate'] / 100 * result['total_attempts']
+    result['tokens_per_hack'] = np.where(hacks > 0, result['mean_total_tokens'] * result['total_attempts'] / hacks, np.nan)
+    return result.round(2)
+
+
+def print_usage(usage_hacking):
+    """Print hacking rate against cost for each factor."""
+    print("\n\nHacking Rate vs Cost by Factor Level:")
+    print("="*60)
+    for factor, factor_df in usage_hacking.groupby('factor', sort=False):
+        print(f"\n{factor.upper().replace('_', ' ')}:")
+        print("-"*40)
+        print(factor_df.drop(columns='factor').to_string(index=False))
+
+
+def print_results(results_df, pivot_table, df=None, seed=0):
+    """Print formatted results; seed makes the bootstrap intervals repeatable."""
     
     print("\n" + "="*60)
     print("HACKING RATES BY MODEL AND EXPERIMENTAL CONDITION")
@@ -131,33 +555,233 @@ def print_results(results_df, pivot_table, df=None):
     print("-"*60)
     print(pivot_table.to_string())
     
+    if df is not None:
+        print("\n\nOverall Hacking Rate by Model (95% bootstrap CI, clustered by condition):")
+        print("-"*60)
+        print(bootstrap_model_ci(df, seed=seed).to_string(index=False))
+    
     print("\n" + "="*60)
 
 
-def main():
+# Version of the typed table layout, stored in the metadata of columnar outputs
+SCHEMA_VERSION = 1
+
+# Columns holding experimental factors, stored dictionary-encoded in columnar outputs
+CATEGORICAL_COLUMNS = (
+    {'model', 'condition', 'factor', 'level', 'metric'}
+    | set(CONDITION_FACTORS)
+    | {f'metadata_{factor}' for factor in CONDITION_FACTORS}
+)
+
+
+def to_arrow(table, name):
+    """
+    Convert a result table to a typed Arrow table.
+    
+    Factor columns become dictionary-encoded string columns, and the table name
+    and schema version are stored in the schema metadata.
+    """
+    arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    fields = [
+        pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+        if field.name in CATEGORICAL_COLUMNS else field
+        for field in arrow_table.schema
+    ]
+    schema = pa.schema(fields, metadata={
+        'table': name,
+        'schema_version': str(SCHEMA_VERSION),
+    })
+    return arrow_table.cast(schema)
+
+
+def consolidate_tables(tables):
+    """
+    Stack all result tables into one Arrow table with a `table` column.
+    
+    Columns missing from a table are filled with nulls. Each table's own
+    columns are listed in the schema metadata, so load_results can split the
+    stacked table back into its parts exactly.
+    """
+    arrow_tables = [to_arrow(table, name) for name, table in tables.items()]
+    schema = pa.unify_schemas([t.schema.remove_metadata() for t in arrow_tables])
+    schema = schema.insert(0, pa.field('table', pa.dictionary(pa.int32(), pa.string())))
+    schema = schema.with_metadata({
+        'schema_version': str(SCHEMA_VERSION),
+        'tables': json.dumps({name: t.column_names for name, t in zip(tables, arrow_tables)}),
+    })
+    
+    parts = []
+    for name, arrow_table in zip(tables, arrow_tables):
+        columns = {
+            field.name: (
+                pa.array([name] * arrow_table.num_rows).dictionary_encode().cast(field.type)
+                if field.name == 'table'
+                else arrow_table[field.name] if field.name in arrow_table.column_names
+                else pa.nulls(arrow_table.num_rows, field.type)
+            )
+            for field in schema
+        }
+        parts.append(pa.table(columns, schema=schema))
+    return pa.concat_tables(parts)
+
+
+def load_results(path):
+    """
+    Load a consolidated results file written by save_results.
+    
+    Args:
+        path: Path to a hacking_rates_all.parquet or hacking_rates_all.arrow file
+    
+    Returns:
+        Dictionary mapping table name to DataFrame
+    """
+    if path.endswith('.parquet'):
+        stacked = pq.read_table(path)
+    else:
+        with pa.memory_map(path) as source:
+            stacked = pa.ipc.open_file(source).read_all()
+    
+    metadata = stacked.schema.metadata
+    version = int(metadata[b'schema_version'])
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported results schema version: {version}")
+    
+    names = stacked['table'].cast(pa.string())
+    if b'tables' in metadata:
+        table_columns = json.loads(metadata[b'tables'])
+    else:
+        # Files written before the column lists were stored: a column that is
+        # null throughout a table is taken to be one it did not have
+        table_columns = {}
+        for name in pc.unique(names).to_pylist():
+            part = stacked.filter(pc.equal(names, name))
+            table_columns[name] = [
+                column for column in part.column_names[1:]
+                if part[column].null_count < part.num_rows
+            ]
+    
+    return {
+        name: stacked.filter(pc.equal(names, name)).select(columns).to_pandas()
+        for name, columns in table_columns.items()
+    }
+
+
+def save_results(tables, output_dir=".", output_formats=("csv",)):
+    """
+    Write each result table to the output directory.
+    
+    Columnar formats (parquet, arrow) additionally get a consolidated
+    hacking_rates_all file holding every table.
+    
+    Args:
+        tables: Dictionary mapping file stem to DataFrame
+        output_dir: Directory to write into
+        output_formats: File formats of the tables
+    
+    Returns:
+        List of written paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for output_format in output_formats:
+        if output_format == "csv":
+            for name, table in tables.items():
+                path = os.path.join(output_dir, f"{name}.csv")
+                table.to_csv(path, index=False)
+                paths.append(path)
+        elif output_format in ("parquet", "arrow"):
+            arrow_tables = {name: to_arrow(table, name) for name, table in tables.items()}
+            arrow_tables["hacking_rates_all"] = consolidate_tables(tables)
+            for name, arrow_table in arrow_tables.items():
+                path = os.path.join(output_dir, f"{name}.{output_format}")
+                _write_columnar(arrow_table, path, output_format)
+                paths.append(path)
+        else:
+            raise ValueError(f"Unknown output format: {output_format}")
+    return paths
+
+
+def _write_columnar(arrow_table, path, output_format):
+    # IPC files allow a single dictionary per column, so merge chunked dictionaries first
+    arrow_table = arrow_table.unify_dictionaries().combine_chunks()
+    if output_format == "parquet":
+        pq.write_table(arrow_table, path, compression="zstd")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, arrow_table.schema, options=options) as writer:
+            writer.write_table(arrow_table)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('log_dirs', nargs='*', default=['logs-bulk-*'],
+                        help='Log directories, log files or glob patterns (default: logs-bulk-*)')
+    parser.add_argument('--since', type=datetime.fromisoformat,
+                        help='Only analyze logs created at or after this ISO timestamp')
+    parser.add_argument('--model', action='append', dest='models',
+                        help='Only analyze models matching this glob pattern (repeatable)')
+    parser.add_argument('--condition', action='append', dest='conditions',
+                        help='Only analyze conditions matching this glob pattern (repeatable)')
+    parser.add_argument('--format', dest='output_formats', nargs='+', choices=['csv', 'parquet', 'arrow'],
+                        default=['csv'], help='Output file formats (default: csv)')
+    parser.add_argument('--output-dir', default='.',
+                        help='Directory to write results into (default: current directory)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the bootstrap confidence intervals, printed and saved (default: 0)')
+    parser.add_argument('--usage', action='store_true',
+                        help='Also report token usage, tool calls and wall time, and hacking rate against cost')
+    parser.add_argument('--watch', action='store_true',
+                        help='Tail the journals of running logs and keep refreshing a live table')
+    parser.add_argument('--interval', type=float, default=5,
+                        help='Seconds between refreshes in watch mode (default: 5)')
+    parser.add_argument('--html',
+                        help='In watch mode, also write a self-refreshing HTML table to this path')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main execution function."""
+    args = parse_args(argv)
+    
+    if args.watch:
+        from live_hacking_rates import watch
+        watch(args.log_dirs, since=args.since, models=args.models, conditions=args.conditions,
+              interval=args.interval, html_path=args.html)
+        return
+    
+    logs = find_logs(args.log_dirs, since=args.since, models=args.models)
+    if not logs:
+        raise SystemExit(f"No logs found matching {' '.join(args.log_dirs)}")
     
     # Analyze hacking rates
-    results, pivot_table, df = analyze_hacking_rates('logs-bulk-20250913161126')
+    results, pivot_table, df = analyze_hacking_rates(logs, conditions=args.conditions)
     
     # Print results with factor analysis
-    print_results(results, pivot_table, df)
+    print_results(results, pivot_table, df, seed=args.seed)
     
-    # Save results to CSV files
-    results.to_csv("hacking_rates_detailed.csv", index=False)
-    pivot_table.to_csv("hacking_rates_pivot.csv")
+    tables = {
+        "hacking_rates_detailed": results,
+        "hacking_rates_pivot": pivot_table.reset_index(),
+    }
     
-    # Save factor analysis results
+    # Factor analysis and bootstrap confidence intervals
     if df is not None:
         factor_results = analyze_by_factor(df)
         for factor, factor_df in factor_results.items():
-            factor_df.to_csv(f"hacking_rates_by_{factor}.csv", index=False)
+            tables[f"hacking_rates_by_{factor}"] = factor_df
+        tables["hacking_rates_ci"] = condition_ci(df)
+        tables["hacking_rates_factor_ci"] = bootstrap_factor_ci(df, seed=args.seed)
+        if args.usage:
+            df = add_usage_columns(df)
+            tables["usage_by_condition"] = usage_by_condition(df)
+            tables["usage_vs_hacking"] = usage_vs_hacking(df)
+            print_usage(tables["usage_vs_hacking"])
+    
+    paths = save_results(tables, args.output_dir, args.output_formats)
     
     print("\nResults saved to:")
-    print("  - hacking_rates_detailed.csv")
-    print("  - hacking_rates_pivot.csv")
-    for factor in ['task_root', 'extra_code', 'header', 'body', 'prompt_suffix']:
-        print(f"  - hacking_rates_by_{factor}.csv")
+    for path in paths:
+        print(f"  - {path}")
 
 
 if __name__ == "__main__":
@@ -30,9 +30,23 @@ def calculate_average_score(scores, weights=None):
     return sum(s * w for s, w in zip(scores, weights))
 
 def calculate_median_score(scores):
-    if not scores:
+    """
+    Calculate the median of scores by selection rather than a full sort.
+
+    np.partition only places the middle order statistic(s), which is linear
+    on average. Lists, tuples and numpy arrays are accepted; arrays are read
+    in place and never turned into a list.
+    """
+    values = np.asarray(scores)
+    count = values.size
+    if count == 0:
         return 0
-    return sorted(scores)[len(scores) / 2]
+
+    middle = count // 2
+    if count % 2:
+        return np.partition(values, middle)[middle].item()
+    # The two middle values are averaged in float64 so large integers cannot overflow
+    return np.partition(values, [middle - 1, middle])[middle - 1:middle + 1].mean(dtype=np.float64).item()
 
 def calculate_stats(scores):
     average = calculate_average_score(scores)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Benchmark the score statistics in grading_system.
+
+Each case times the current implementation against the one it replaced, on
+the same random scores, for sizes from 10^3 up to 10^max-exponent:
+  median    sorted() and indexing vs calculate_median_score (np.partition)
+  average   generator sum over default weights vs calculate_average_score
+  weighted  generator sum over given weights vs np.dot in blocks
+  rows      calculate_stats called per row vs once on all rows, for a
+            matrix of rows of 20 scores and for ragged rows of 10 to 30
+  native    pure Python vs numpy vs the square.so kernels (c_mean,
+            c_weighted_mean, c_median) on float64 arrays; skipped unless
+            square.so was built by build_kernels.py
+  threads   the native kernels (c_square, c_mean, c_weighted_mean,
+            c_median) at each --threads count; and 'py-threads', that many
+            Python threads each squaring its own array on one kernel
+            thread at once, which stays flat as threads rise if calls
+            scale across cores
+
+Inputs are timed both as a Python list and as a numpy array, since callers
+pass both. The old implementations are slow and memory hungry at the largest
+sizes (sorting a list of 10^8 floats needs several GB), so they only run up to
+--baseline-max-exponent.
+
+grading_system loads square.so with CDLL, so run from the repository root
+with the library on the loader path:
+  LD_LIBRARY_PATH=. python benchmark_stats.py --max-exponent 8
+"""
+
+import argparse
+import os
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def sorted_median(scores):
+    """The median as calculate_median_score computed it before selection."""
+    ordered = sorted(scores)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+
+def sorted_quantiles(scores):
+    """QUANTILES the way a median-style function gives them: one full sort per quantile."""
+    results = []
+    for quantile in QUANTILES:
+        ordered = sorted(scores)
+        position = (len(ordered) - 1) * quantile
+        below = int(position)
+        above = min(below + 1, len(ordered) - 1)
+        results.append(ordered[below] + (ordered[above] - ordered[below]) * (position - below))
+    return np.array(results)
+
+
+def generator_average(scores, weights=None):
+    """The average as calculate_average_score computed it before vectorizing (less the exact sum check)."""
+    if weights is None:
+        weights = [1/len(scores)] * len(scores)
+    np.sum(weights)  # the old weight-sum check, timed but not enforced
+    return sum(s * w for s, w in zip(scores, weights))
+
+
+def best_time(function, arguments, repeat):
+    """Fastest of `repeat` single calls, in seconds."""
+    return min(timeit.repeat(lambda: function(*arguments), number=1, repeat=repeat))
+
+
+def benchmark(name, baseline, current, sizes, baseline_max_size, repeat, weighted=False, seed=0):
+    """
+    Time baseline and current implementations of one statistic.
+
+    Args:
+        weighted: Pass random weights summing to 1 after the scores
+
+    Returns:
+        List of (size, input type, baseline seconds or None, current seconds)
+    """
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size in sizes:
+        array = rng.random(size) * 100
+        weights = rng.random(size) if weighted else None
+        if weighted:
+            weights /= weights.sum()
+        inputs = {'ndarray': (array, weights)}
+        if size <= baseline_max_size:
+            inputs['list'] = (array.tolist(), weights.tolist() if weighted else None)
+        for kind, (scores, kind_weights) in inputs.items():
+            arguments = (scores, kind_weights) if weighted else (scores,)
+            runs = repeat if size < 10**7 else 1
+            current_time = best_time(current, arguments, runs)
+            baseline_time = best_time(baseline, arguments, runs) if size <= baseline_max_size else None
+            if baseline_time is not None:
+                assert np.allclose(baseline(*arguments), current(*arguments)), f"{name} disagrees at size {size}"
+            rows.append((size, kind, baseline_time, current_time))
+    return rows
+
+
+def stats_per_row(rows):
+    """Row statistics the way callers computed them before calculate_stats took batches."""
+    from grading_system import calculate_stats
+
+    results = [calculate_stats(row) for row in rows]
+    return np.array([[result['average'], result['median']] for result in results])
+
+
+def benchmark_rows(sizes, baseline_max_size, repeat, width=20, seed=0):
+    """
+    Time per-row calls against one batched calculate_stats call.
+
+    Sizes count scores, not rows.
+
+    Returns:
+        List of (size, input type, baseline seconds or None, current seconds)
+    """
+    from grading_system import calculate_stats
+
+    def batched(rows):
+        result = calculate_stats(rows)
+        return np.column_stack([result['average'], result['median']])
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        matrix = rng.random((size // width, width)) * 100
+        lengths = rng.integers(width // 2, width * 3 // 2 + 1, size // width)
+        inputs = {'matrix': matrix, 'ragged': [row[:length].tolist() for row, length in
+                                               zip(rng.random((size // width, width * 3 // 2)) * 100, lengths)]}
+        for kind, rows in inputs.items():
+            runs = repeat if size < 10**7 else 1
+            current_time = best_time(batched, (rows,), runs)
+            baseline_time = best_time(stats_per_row, (rows,), runs) if size <= baseline_max_size else None
+            if baseline_time is not None:
+                assert np.allclose(stats_per_row(rows), batched(rows)), f"rows disagree at size {size}"
+            results.append((size, kind, baseline_time, current_time))
+    return results
+
+
+def benchmark_groups(sizes, baseline_max_size, repeat, group_size=100, max_groups=10**5, seed=0):
+    """
+    Time a pandas groupby over calculate_stats against calculate_stats_by.
+
+    Returns:
+        List of (size, input type, baseline seconds or None, current seconds)
+    """
+    import pandas as pd
+    from grading_system import calculate_stats, calculate_stats_by
+
+    def per_group(keys, scores):
+        stats = pd.Series(scores).groupby(keys).apply(lambda group: pd.Series(calculate_stats(group.to_numpy())))
+        return stats.unstack()[['average', 'median']].to_numpy()
+
+    def grouped(keys, scores):
+        result = calculate_stats_by(keys, scores)
+        return np.column_stack([result['average'], result['median']])
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        keys = rng.integers(0, min(max(size // group_size, 1), max_groups), size)
+        scores = rng.random(size) * 100
+        runs = repeat if size < 10**7 else 1
+        current_time = best_time(grouped, (keys, scores), runs)
+        baseline_time = best_time(per_group, (keys, scores), runs) if size <= baseline_max_size else None
+        if baseline_time is not None:
+            assert np.allclose(per_group(keys, scores), grouped(keys, scores)), f"groups disagree at size {size}"
+        results.append((size, 'ndarray', baseline_time, current_time))
+    return results
+
+
+def benchmark_streaming(sizes, baseline_max_size, repeat, batch=1000, seed=0):
+    """
+    Time recomputing calculate_stats per batch against StreamingStats.
+
+    Returns:
+        List of (size, mode, baseline seconds or None, current seconds)
+    """
+    from grading_system import StreamingStats, calculate_stats
+
+    def recompute(batches):
+        history = []
+        for scores in batches:
+            history.append(scores)
+            stats = calculate_stats(np.concatenate(history))
+        return stats
+
+    def stream(batches, exact):
+        accumulator = StreamingStats(exact=exact)
+        for scores in batches:
+            accumulator.update(scores)
+            stats = accumulator.stats()
+        return stats
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        batches = np.array_split(rng.random(size) * 100, max(size // batch, 1))
+        runs = repeat if size < 10**6 else 1
+        baseline_time = best_time(recompute, (batches,), runs) if size <= baseline_max_size else None
+        expected = recompute(batches)
+        for mode, exact in [('p2', False), ('exact', True)]:
+            current_time = best_time(stream, (batches, exact), runs)
+            result = stream(batches, exact)
+            assert np.isclose(result['average'], expected['average']), f"streaming average disagrees at size {size}"
+            if exact:
+                assert result['median'] == expected['median'], f"streaming median disagrees at size {size}"
+            results.append((size, mode, baseline_time, current_time))
+    return results
+
+
+def benchmark_native(sizes, baseline_max_size, repeat, seed=0):
+    """
+    Time pure Python, numpy and the native kernels on the same float64 scores.
+
+    Returns:
+        List of (statistic, size, python seconds or None, numpy seconds, native seconds)
+    """
+    from grading_system import (calculate_average_score, calculate_median_score,
+                                native_average_score, native_median_score)
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        scores = rng.random(size) * 100
+        weights = rng.random(size)
+        weights /= weights.sum()
+        cases = [
+            ('average', generator_average, calculate_average_score, native_average_score, (scores,)),
+            ('weighted', generator_average, calculate_average_score, native_average_score, (scores, weights)),
+            ('median', sorted_median, calculate_median_score, native_median_score, (scores,)),
+        ]
+        runs = repeat if size < 10**7 else 1
+        for name, python_version, numpy_version, native_version, arguments in cases:
+            numpy_time = best_time(numpy_version, arguments, runs)
+            native_time = best_time(native_version, arguments, runs)
+            assert np.isclose(numpy_version(*arguments), native_version(*arguments)), f"{name} disagrees at size {size}"
+            python_time = None
+            if size <= baseline_max_size:
+                lists = tuple(argument.tolist() for argument in arguments)
+                python_time = best_time(python_version, lists, runs)
+            results.append((name, size, python_time, numpy_time, native_time))
+    return results
+
+
+def benchmark_threads(sizes, thread_counts, repeat, seed=0):
+    """
+    Time the native kernels split across each number of threads.
+
+    Returns:
+        List of (kernel, size, {threads: seconds}), with the Python-thread
+        fan-out reported as kernel 'py-threads'
+    """
+    from grading_system import (native_average_score, native_median_score, native_square,
+                                set_native_parallel_threshold, set_native_threads)
+
+    rng = np.random.default_rng(seed)
+    kernels = [
+        ('square', lambda scores, weights, out: native_square(scores, out)),
+        ('average', lambda scores, weights, out: native_average_score(scores)),
+        ('weighted', lambda scores, weights, out: native_average_score(scores, weights)),
+        ('median', lambda scores, weights, out: native_median_score(scores)),
+    ]
+    previous_threshold = set_native_parallel_threshold(1)
+    results = []
+    try:
+        for size in sizes:
+            scores = rng.random(size) * 100
+            arguments = (scores, rng.random(size), np.empty_like(scores))
+            runs = repeat if size < 10**7 else 1
+            for name, kernel in kernels:
+                times = {}
+                for threads in thread_counts:
+                    set_native_threads(threads)
+                    kernel(*arguments)  # warm up the thread pool and output pages
+                    times[threads] = best_time(kernel, arguments, runs)
+                results.append((name, size, times))
+
+            # One array per Python thread; each call runs its kernel on one thread
+            set_native_threads(1)
+            times = {}
+            for threads in thread_counts:
+                pairs = [(scores.copy(), np.empty_like(scores)) for _ in range(threads)]
+                with ThreadPoolExecutor(threads) as pool:
+                    def square_all():
+                        list(pool.map(lambda pair: native_square(*pair), pairs))
+                    square_all()
+                    times[threads] = best_time(square_all, (), runs)
+            results.append(('py-threads', size, times))
+    finally:
+        set_native_threads(None)
+        set_native_parallel_threshold(previous_threshold)
+    return results
+
+
+def print_thread_rows(rows, thread_counts):
+    print("\nthreads")
+    print(f"{'kernel':>10} {'size':>12} " + " ".join(f"{f'{threads} thr (s)':>12}" for threads in thread_counts))
+    for name, size, times in rows:
+        print(f"{name:>10} {size:>12,} " + " ".join(f"{times[threads]:12.6f}" for threads in thread_counts))
+
+
+def print_native_rows(rows):
+    print("\nnative")
+    print(f"{'statistic':>10} {'size':>12} {'python (s)':>12} {'numpy (s)':>12} {'native (s)':>12} {'vs numpy':>9}")
+    for name, size, python_time, numpy_time, native_time in rows:
+        python = f"{python_time:12.6f}" if python_time is not None else f"{'-':>12}"
+        print(f"{name:>10} {size:>12,} {python} {numpy_time:12.6f} {native_time:12.6f} {numpy_time / native_time:8.1f}x")
+
+
+def print_rows(name, rows):
+    print(f"\n{name}")
+    print(f"{'size':>12} {'input':>8} {'before (s)':>12} {'after (s)':>12} {'speedup':>9}")
+    for size, kind, baseline_time, current_time in rows:
+        before = f"{baseline_time:12.6f}" if baseline_time is not None else f"{'-':>12}"
+        speedup = f"{baseline_time / current_time:8.1f}x" if baseline_time is not None else f"{'-':>9}"
+        print(f"{size:>12,} {kind:>8} {before} {current_time:12.6f} {speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--min-exponent', type=int, default=3, help='Smallest size as a power of ten (default: 3)')
+    parser.add_argument('--max-exponent', type=int, default=7, help='Largest size as a power of ten (default: 7)')
+    parser.add_argument('--baseline-max-exponent', type=int, default=7,
+                        help='Largest size the old implementations run at (default: 7)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Calls per measurement below 10^7, best one kept (default: 5)')
+    parser.add_argument('--threads', type=lambda value: [int(count) for count in value.split(',')],
+                        default=sorted({1, os.cpu_count() or 1}),
+                        help='Comma-separated native thread counts to compare (default: 1 and all cores)')
+    parser.add_argument('--stream-batch', type=int, default=1000,
+                        help='Scores per batch in the streaming case (default: 1000)')
+    parser.add_argument('--stream-max-exponent', type=int, default=6,
+                        help='Largest size the streaming case runs at (default: 6)')
+    args = parser.parse_args()
+
+    from grading_system import NATIVE_KERNELS, calculate_average_score, calculate_median_score, calculate_stats
+
+    def partition_quantiles(scores):
+        return calculate_stats(scores, quantiles=QUANTILES)['quantiles']
+
+    sizes = [10**exponent for exponent in range(args.min_exponent, args.max_exponent + 1)]
+    baseline_max_size = 10**args.baseline_max_exponent
+
+    print_rows('median', benchmark('median', sorted_median, calculate_median_score,
+                                   sizes, baseline_max_size, args.repeat))
+    print_rows('average', benchmark('average', generator_average, calculate_average_score,
+                                    sizes, baseline_max_size, args.repeat))
+    print_rows('weighted average', benchmark('weighted average', generator_average, calculate_average_score,
+                                             sizes, baseline_max_size, args.repeat, weighted=True))
+    print_rows('rows', benchmark_rows(sizes, baseline_max_size, args.repeat))
+    print_rows('groups', benchmark_groups(sizes, baseline_max_size, args.repeat))
+    print_rows('quantiles', benchmark('quantiles', sorted_quantiles, partition_quantiles,
+                                      sizes, baseline_max_size, args.repeat))
+    stream_sizes = [size for size in sizes if size <= 10**args.stream_max_exponent]
+    print_rows('streaming', benchmark_streaming(stream_sizes, baseline_max_size, args.repeat, args.stream_batch))
+    if NATIVE_KERNELS:
+        print_native_rows(benchmark_native(sizes, baseline_max_size, args.repeat))
+        print_thread_rows(benchmark_threads(sizes, args.threads, args.repeat), args.threads)
+    else:
+        print("\nnative: skipped, square.so has no stats kernels (run build_kernels.py)")
+
+
+if __name__ == "__main__":
+    main()
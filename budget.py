@@ -0,0 +1,221 @@
+"""
+Token and cost budgets for evaluation runs.
+
+A BudgetController holds per-model and global ceilings on tokens and/or cost.
+Usage reaches it through inspect hooks (every model call, every finished
+sample), and the budget_gate solver asks it before each sample starts. Once a
+model's average cost per finished sample is known, a sample is only admitted
+if the spend so far plus the expected cost of the samples in flight and of the
+new one stays under every ceiling; otherwise the model is stopped for the rest
+of the run. Refused samples end with a `custom` limit recorded in the log and
+are not scored.
+
+Usage:
+    set_budget_controller(BudgetController(model_budgets={'openai/gpt-5': {'tokens': 5e6}}))
+    eval_set(...)   # tasks include budget_gate() as their first solver
+"""
+
+import logging
+from collections import Counter, defaultdict
+
+from inspect_ai.hooks import Hooks, hooks
+from inspect_ai.log import transcript
+from inspect_ai.solver import Generate, Solver, TaskState, solver
+from inspect_ai.util import LimitExceededError
+
+logger = logging.getLogger(__name__)
+
+UNITS = ('tokens', 'cost')
+
+_controller = None
+
+
+def usage_cost(usage, price):
+    """
+    Cost in dollars of one ModelUsage.
+
+    Uses the cost inspect computed when available, otherwise the price in
+    dollars per million input and output tokens. Cached input is charged at
+    the full input price, so the estimate errs high.
+    """
+    if usage.total_cost is not None:
+        return usage.total_cost
+    if price is None:
+        return 0.0
+    input_tokens = usage.input_tokens + (usage.input_tokens_cache_write or 0) + (usage.input_tokens_cache_read or 0)
+    return (input_tokens * price['input'] + usage.output_tokens * price['output']) / 1_000_000
+
+
+class BudgetController:
+    """
+    Tracks spend per model and decides whether new samples may start.
+
+    Args:
+        model_budgets: Model name -> {'tokens': ceiling, 'cost': ceiling}, either key optional
+        total_budget: {'tokens': ceiling, 'cost': ceiling} over all models
+        prices: Model name -> {'input': $/M tokens, 'output': $/M tokens}, for cost ceilings
+        min_samples: Finished samples of a model needed before its spend is projected
+    """
+
+    def __init__(self, model_budgets=None, total_budget=None, prices=None, min_samples=5):
+        self.model_budgets = model_budgets or {}
+        self.total_budget = total_budget or {}
+        self.prices = prices or {}
+        self.min_samples = min_samples
+
+        self.spent = defaultdict(lambda: dict.fromkeys(UNITS, 0.0))
+        self.finished_spend = defaultdict(lambda: dict.fromkeys(UNITS, 0.0))
+        self.finished = Counter()
+        self.in_flight = Counter()
+        self.expected = Counter()
+        self.refused = set()
+        self.stopped = {}
+        self.warned = set()
+
+    def _usage(self, model, usage):
+        return {'tokens': usage.total_tokens, 'cost': usage_cost(usage, self.prices.get(model))}
+
+    def start_task(self, model, samples):
+        """Register the number of samples a task will run for a model."""
+        self.expected[model] += samples
+
+    def record_usage(self, model, usage):
+        """Add the usage of one model call."""
+        for unit, value in self._usage(model, usage).items():
+            self.spent[model][unit] += value
+
+    def admit(self, model):
+        """
+        Decide whether a new sample for a model may start.
+
+        Returns:
+            None if it may, otherwise the reason it was refused
+        """
+        if model in self.stopped:
+            return self.stopped[model]
+
+        reason = self._exceeded(model)
+        if reason is not None:
+            self.stopped[model] = reason
+            logger.warning(f"Budget: stopping new samples for {model}: {reason}")
+            return reason
+
+        self.in_flight[model] += 1
+        return None
+
+    def sample_finished(self, model, model_usage, refused=False):
+        """
+        Account for a finished sample.
+
+        Args:
+            model: Model under evaluation
+            model_usage: The sample's model name -> ModelUsage
+            refused: The sample was refused by admit and never ran
+        """
+        if refused:
+            return
+        self.in_flight[model] = max(self.in_flight[model] - 1, 0)
+        self.finished[model] += 1
+        for name, usage in model_usage.items():
+            for unit, value in self._usage(name, usage).items():
+                self.finished_spend[model][unit] += value
+
+        if self.finished[model] == self.min_samples and model not in self.warned:
+            self.warned.add(model)
+            projected = self.projection(model)
+            for unit, ceiling in self.model_budgets.get(model, {}).items():
+                if projected[unit] > ceiling:
+                    logger.warning(
+                        f"Budget: {model} is projected to use {projected[unit]:,.2f} {unit} over "
+                        f"{self.expected[model]} samples, above its ceiling of {ceiling:,.2f}"
+                    )
+
+    def per_sample(self, model):
+        """Average spend per finished sample, or None before min_samples have finished."""
+        if self.finished[model] < self.min_samples:
+            return None
+        return {unit: self.finished_spend[model][unit] / self.finished[model] for unit in UNITS}
+
+    def projection(self, model):
+        """Projected total spend of a model once all its expected samples have run."""
+        per_sample = self.per_sample(model) or dict.fromkeys(UNITS, 0.0)
+        remaining = max(self.expected[model] - self.finished[model], 0)
+        return {unit: self.finished_spend[model][unit] + per_sample[unit] * remaining for unit in UNITS}
+
+    def _committed(self, model, extra=0):
+        """Spend so far plus the expected spend of the samples in flight and `extra` new ones."""
+        per_sample = self.per_sample(model) or dict.fromkeys(UNITS, 0.0)
+        pending = self.in_flight[model] + extra
+        return {unit: max(self.spent[model][unit], self.finished_spend[model][unit]) + per_sample[unit] * pending
+                for unit in UNITS}
+
+    def _exceeded(self, model):
+        committed = self._committed(model, extra=1)
+        for unit, ceiling in self.model_budgets.get(model, {}).items():
+            if committed[unit] > ceiling:
+                return f"{unit} for {model} would reach {committed[unit]:,.2f}, above the ceiling of {ceiling:,.2f}"
+
+        if self.total_budget:
+            models = set(self.spent) | set(self.in_flight) | {model}
+            total = dict.fromkeys(UNITS, 0.0)
+            for name in models:
+                for unit, value in self._committed(name, extra=int(name == model)).items():
+                    total[unit] += value
+            for unit, ceiling in self.total_budget.items():
+                if total[unit] > ceiling:
+                    return f"total {unit} would reach {total[unit]:,.2f}, above the ceiling of {ceiling:,.2f}"
+        return None
+
+
+def set_budget_controller(controller):
+    """Install the controller consulted by budget_gate and fed by the budget hooks (None to disable)."""
+    global _controller
+    _controller = controller
+
+
+def get_budget_controller():
+    return _controller
+
+
+@hooks(name="budget_guard", description="Tracks model usage for the budget controller")
+class BudgetHooks(Hooks):
+    def __init__(self):
+        self.eval_models = {}
+
+    def enabled(self):
+        return _controller is not None
+
+    async def on_task_start(self, data):
+        model = str(data.spec.model)
+        self.eval_models[data.eval_id] = model
+        samples = (data.spec.dataset.samples or 0) * (data.spec.config.epochs or 1)
+        _controller.start_task(model, samples)
+
+    async def on_model_usage(self, data):
+        _controller.record_usage(data.model_name, data.usage)
+
+    async def on_sample_end(self, data):
+        model = self.eval_models.get(data.eval_id)
+        if model is None:
+            return
+        refused = data.sample.uuid in _controller.refused
+        _controller.sample_finished(model, data.sample.model_usage, refused=refused)
+
+
+@solver
+def budget_gate() -> Solver:
+    """Refuse to start a sample when the installed BudgetController says the budget would be exceeded."""
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        controller = _controller
+        if controller is None:
+            return state
+
+        reason = controller.admit(str(state.model))
+        if reason is not None:
+            controller.refused.add(state.uuid)
+            state.metadata["budget_stopped"] = reason
+            transcript().info(f"Sample not run: {reason}")
+            raise LimitExceededError("custom", value=1, limit=0, message=f"Budget exceeded: {reason}")
+        return state
+
+    return solve
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Build square.so, the native score kernels grading_system loads with CDLL.
+
+square.c is compiled as a setuptools extension, but linked as a plain shared
+library named square.so (no Python ABI tag) since it is loaded through ctypes
+rather than imported. Compiler flags are fixed here so every build gives the
+same numerics: -O2 without -ffast-math, so summation order is kept.
+
+The kernels are built with OpenMP (-fopenmp) so large inputs are split
+across threads; pass --no-openmp for a compiler without it, which gives
+serial kernels with the same results.
+
+Usage (needs a C compiler; setuptools is in the dev dependency group, which
+`uv sync` installs by default):
+    python build_kernels.py
+    LD_LIBRARY_PATH=. python -m pytest test_grading_system.py
+"""
+
+import argparse
+import os
+import tempfile
+
+from setuptools import Distribution, Extension
+from setuptools.command.build_ext import build_ext
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+COMPILE_ARGS = ['-O2', '-std=c99', '-fno-fast-math']
+OPENMP_ARGS = ['-fopenmp']
+# Without OpenMP the pragmas, and the thread counts they take, are unused
+SERIAL_ARGS = ['-Wno-unknown-pragmas', '-Wno-unused-variable']
+KERNELS = ['c_square', 'c_mean', 'c_weighted_mean', 'c_median',
+           'c_set_threads', 'c_get_threads', 'c_set_parallel_threshold', 'c_get_parallel_threshold']
+
+
+class build_shared_library(build_ext):
+    """build_ext that names its output <name>.so, as CDLL('square.so') expects."""
+
+    def get_ext_filename(self, fullname):
+        return fullname + '.so'
+
+    def get_export_symbols(self, ext):
+        # Exports are the kernels themselves, not a PyInit_ function
+        return ext.export_symbols
+
+
+def build(output_dir=ROOT, openmp=True, verbose=False):
+    """
+    Compile square.c into output_dir/square.so.
+
+    Args:
+        openmp: Compile and link with OpenMP so kernels can use several threads
+
+    Returns:
+        Path of the built library
+    """
+    extension = Extension(
+        'square',
+        sources=[os.path.join(ROOT, 'square.c')],
+        extra_compile_args=COMPILE_ARGS + (OPENMP_ARGS if openmp else SERIAL_ARGS),
+        extra_link_args=OPENMP_ARGS if openmp else [],
+        export_symbols=KERNELS,
+    )
+    distribution = Distribution({'name': 'square', 'ext_modules': [extension]})
+    distribution.verbose = verbose
+    command = build_shared_library(distribution)
+    command.build_lib = output_dir
+    command.force = True
+    with tempfile.TemporaryDirectory() as build_temp:
+        command.build_temp = build_temp
+        command.ensure_finalized()
+        command.run()
+    return os.path.join(output_dir, 'square.so')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output-dir', default=ROOT, help='Directory to write square.so to (default: repository root)')
+    parser.add_argument('--no-openmp', action='store_true', help='Build serial kernels without OpenMP')
+    parser.add_argument('--verbose', action='store_true', help='Show compiler commands')
+    args = parser.parse_args()
+
+    print(f"Built {build(args.output_dir, openmp=not args.no_openmp, verbose=args.verbose)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Incrementally build the listing.json used by the logs-www static viewer.
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def read_log_header(path):
+    """
+    Read the header of an .eval archive without touching its samples.
+
+    zipfile only reads the central directory plus the requested member, so this
+    costs the same for a 3 MB archive as for a 3 KB one. Logs that are still
+    running have no header.json yet and fall back to the journal start entry.
+
+    Returns:
+        Header dictionary in the layout of header.json
+    """
+    with zipfile.ZipFile(path) as archive:
+        try:
+            return json.loads(archive.read('header.json'))
+        except KeyError:
+            start = json.loads(archive.read('_journal/start.json'))
+    return {
+        'version': start['version'],
+        'status': 'started',
+        'eval': start['eval'],
+        'stats': {},
+    }
+
+
+def to_overview(header):
+    """Thin a log header down to its listing.json entry."""
+    eval_spec = header['eval']
+    stats = header.get('stats') or {}
+
+    primary_metric = None
+    scores = (header.get('results') or {}).get('scores') or []
+    if scores and scores[0].get('metrics'):
+        primary_metric = next(iter(scores[0]['metrics'].values()))
+
+    return {
+        'eval_id': eval_spec['eval_id'],
+        'run_id': eval_spec['run_id'],
+        'task': eval_spec['task'],
+        'task_id': eval_spec['task_id'],
+        'task_version': eval_spec['task_version'],
+        'version': header['version'],
+        'status': header['status'],
+        'model': eval_spec['model'],
+        'started_at': stats.get('started_at', ''),
+        'completed_at': stats.get('completed_at', ''),
+        'primary_metric': primary_metric,
+    }
+
+
+def sort_listing(listing):
+    """
+    Order listing entries as inspect does: most recently written log first.
+
+    Logs still running (no completed_at yet) come first, then finished logs
+    by completion time, newest first; equal times fall back to the name.
+    """
+    def key(item):
+        name, overview = item
+        completed = overview['completed_at']
+        return (not completed, datetime.fromisoformat(completed).timestamp() if completed else 0.0, name)
+    return dict(sorted(listing.items(), key=key, reverse=True))
+
+
+def update_listing(log_dir, force=False, workers=8):
+    """
+    Bring listing.json up to date with the .eval archives in a log directory.
+
+    Only archives that are missing from the listing or were modified after it
+    was last written are read; entries for deleted archives are dropped.
+
+    Args:
+        log_dir: Directory containing .eval archives
+        force: Re-read every archive instead of only new or changed ones
+        workers: Number of threads reading archive headers
+
+    Returns:
+        Tuple of (listing dictionary, names of the re-read archives)
+    """
+    listing_path = os.path.join(log_dir, 'listing.json')
+    listing = {}
+    listing_mtime = 0
+    if os.path.exists(listing_path) and not force:
+        with open(listing_path) as f:
+            listing = json.load(f)
+        listing_mtime = os.stat(listing_path).st_mtime
+
+    # Anything modified after this point is picked up by the next run
+    started = time.time()
+
+    names = [os.path.relpath(path, log_dir) for path in glob.glob(os.path.join(log_dir, '**', '*.eval'), recursive=True)]
+    stale = [
+        name for name in names
+        if name not in listing or os.stat(os.path.join(log_dir, name)).st_mtime > listing_mtime
+    ]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        headers = executor.map(read_log_header, [os.path.join(log_dir, name) for name in stale])
+        fresh = {name: to_overview(header) for name, header in zip(stale, headers)}
+
+    listing = sort_listing({name: fresh.get(name) or listing[name] for name in names})
+
+    tmp_path = f"{listing_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(listing, f, indent=2)
+    os.replace(tmp_path, listing_path)
+    os.utime(listing_path, (started, started))
+
+    return listing, stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('log_dir', nargs='?', default='logs-www/logs',
+                        help='Directory containing .eval archives (default: logs-www/logs)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-read every archive instead of only new or changed ones')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='Number of threads reading archive headers (default: 8)')
+    args = parser.parse_args()
+
+    listing, stale = update_listing(args.log_dir, force=args.force, workers=args.workers)
+    print(f"Updated {len(stale)} of {len(listing)} entries in {os.path.join(args.log_dir, 'listing.json')}")
+
+
+if __name__ == "__main__":
+    main()
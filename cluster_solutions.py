@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Cluster the final code.py of every sample into solution strategies with MinHash LSH.
+
+The starting code.py differs between conditions (headers, bodies and up to
+4000 lines of extra code), so each solution is represented by its change: the
+token stream of the lines removed from and added to the starting file. Token
+shingles are MinHashed, signatures that collide in any LSH band are candidate
+pairs, and candidates whose estimated Jaccard similarity reaches the threshold
+are merged into one cluster, so only colliding pairs are ever compared.
+
+Final files come from transcripts.replay_edits; samples whose final code.py
+cannot be replayed are counted but not clustered.
+"""
+
+import argparse
+import os
+import re
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Mersenne prime for the universal hash family; 32-bit shingle hashes keep a * x + b within uint64
+MERSENNE_PRIME = (1 << 31) - 1
+TOKEN = re.compile(r'[A-Za-z_]\w*|\d+|\S')
+
+
+def solution_change(initial, final):
+    """
+    Lines removed from the starting code.py and lines added to it, in file order.
+
+    Blank lines and comments are ignored and indentation is stripped.
+
+    Returns:
+        List of lines prefixed with `-` (removed, listed first) or `+` (added)
+    """
+    def lines(code):
+        return [line.strip() for line in code.splitlines() if line.strip() and not line.strip().startswith('#')]
+
+    initial_lines, final_lines = lines(initial), lines(final)
+    initial_set, final_set = set(initial_lines), set(final_lines)
+    return ([f"-{line}" for line in initial_lines if line not in final_set]
+            + [f"+{line}" for line in final_lines if line not in initial_set])
+
+
+def solution_tokens(change):
+    """Token stream of a change; each line starts with its `-` or `+` marker token."""
+    tokens = []
+    for line in change:
+        tokens.append(line[0])
+        tokens.extend(TOKEN.findall(line[1:]))
+    return tokens
+
+
+def shingles(tokens, size=4):
+    """Hash the overlapping token n-grams of a token stream to 32-bit integers."""
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams)))
+
+
+def minhash_signatures(shingle_sets, num_perm=128, seed=0):
+    """
+    Compute MinHash signatures.
+
+    Args:
+        shingle_sets: List of uint64 arrays of shingle hashes
+        num_perm: Number of hash functions
+        seed: Seed of the hash function coefficients
+
+    Returns:
+        Array of shape (len(shingle_sets), num_perm); empty sets get all-max rows
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(shingle_sets), num_perm), MERSENNE_PRIME, dtype=np.uint64)
+    for i, hashes in enumerate(shingle_sets):
+        if len(hashes):
+            values = hashes % np.uint64(MERSENNE_PRIME)
+            signatures[i] = ((np.outer(values, a) + b) % np.uint64(MERSENNE_PRIME)).min(axis=0)
+    return signatures
+
+
+def lsh_clusters(signatures, bands=32, threshold=0.5):
+    """
+    Group signatures into clusters of near-duplicates.
+
+    Signatures are cut into bands; any two that agree on a whole band are
+    candidates, and candidates whose signatures agree on at least `threshold`
+    of their positions are joined (transitively, with union-find).
+
+    Returns:
+        Array with the cluster number of every signature, numbered by decreasing size
+    """
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = np.arange(count)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i, key in enumerate(block.view(f'V{block.dtype.itemsize * rows}').ravel()):
+            buckets[key.tobytes()].append(i)
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                root, other_root = find(first), find(other)
+                if root != other_root and np.mean(signatures[first] == signatures[other]) >= threshold:
+                    parent[other_root] = root
+
+    roots = np.array([find(i) for i in range(count)])
+    sizes = Counter(roots.tolist())
+    order = {root: number for number, (root, _) in enumerate(sizes.most_common())}
+    return np.array([order[root] for root in roots.tolist()])
+
+
+def load_solutions(log_paths):
+    """
+    Replay the final code.py of every sample.
+
+    Returns:
+        Tuple of (DataFrame with one row per replayable sample, number of samples that could not be replayed)
+    """
+    from analyze_hacking_rates import sample_condition
+    from hack_detector import detect_hack, EXACT_PATH_TASKS
+    from transcripts import initial_code, iter_samples, replay_edits
+
+    rows = []
+    skipped = 0
+    for path, model, sample in iter_samples(log_paths):
+        score = ((sample.get('scores') or {}).get('test_scoring') or {}).get('value')
+        if not isinstance(score, dict) or 'hacked' not in score:
+            continue
+        _, final = replay_edits(sample)
+        if final is None:
+            skipped += 1
+            continue
+        metadata = sample['metadata']
+        exact_path = os.path.basename(metadata['task_root']) in EXACT_PATH_TASKS
+        rows.append({
+            'log': path,
+            'id': sample['id'],
+            'epoch': sample['epoch'],
+            'model': model,
+            'condition': sample_condition(metadata),
+            'hacked': score.get('hacked') == 'I',
+            'solved': score.get('tests_passed') == 'C',
+            'static_verdict': detect_hack(final, exact_path=exact_path)[0],
+            'change': solution_change(initial_code(metadata), final),
+        })
+    return pd.DataFrame(rows), skipped
+
+
+def summarize_clusters(df):
+    """
+    Hack and solve rates of every cluster.
+
+    Returns:
+        DataFrame with one row per cluster, largest first
+    """
+    def example(changes):
+        # The most common change of the cluster, abbreviated to its first removed and added lines
+        change = Counter(map(tuple, changes)).most_common(1)[0][0]
+        removed = [line for line in change if line.startswith('-')][:2]
+        added = [line for line in change if line.startswith('+')][:2]
+        return " | ".join(removed + added) or "(unchanged)"
+
+    summary = df.groupby('cluster').agg(
+        samples=('id', 'size'),
+        hacked_rate=('hacked', 'mean'),
+        solved_rate=('solved', 'mean'),
+        models=('model', lambda models: ", ".join(f"{model} ({n})" for model, n in Counter(models).most_common(3))),
+        static_verdict=('static_verdict', lambda verdicts: Counter(verdicts).most_common(1)[0][0]),
+        example=('change', example),
+    )
+    summary['hacked_rate'] *= 100
+    summary['solved_rate'] *= 100
+    return summary.sort_values('samples', ascending=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log_dirs', nargs='*', default=['logs-bulk-*'],
+                        help='Log directories, log files or glob patterns (default: logs-bulk-*)')
+    parser.add_argument('--shingle-size', type=int, default=4, help='Tokens per shingle (default: 4)')
+    parser.add_argument('--num-perm', type=int, default=128, help='MinHash functions (default: 128)')
+    parser.add_argument('--bands', type=int, default=32, help='LSH bands (default: 32)')
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help='Estimated Jaccard similarity needed to join two solutions (default: 0.5)')
+    parser.add_argument('--min-size', type=int, default=2,
+                        help='Only print clusters with at least this many samples (default: 2)')
+    parser.add_argument('--output', help='Also write the per-sample cluster assignment to this CSV file')
+    args = parser.parse_args()
+    if args.num_perm % args.bands:
+        parser.error('--num-perm must be a multiple of --bands')
+
+    from analyze_hacking_rates import find_logs
+
+    logs = [path for path in find_logs(args.log_dirs) if path.endswith('.eval')]
+    if not logs:
+        raise SystemExit(f"No logs found matching {' '.join(args.log_dirs)}")
+
+    df, skipped = load_solutions(logs)
+    signatures = minhash_signatures([shingles(solution_tokens(change), args.shingle_size) for change in df['change']],
+                                    num_perm=args.num_perm)
+    df['cluster'] = lsh_clusters(signatures, bands=args.bands, threshold=args.threshold)
+
+    summary = summarize_clusters(df)
+    print(f"{len(df)} solutions in {len(summary)} clusters ({skipped} samples could not be replayed)\n")
+    with pd.option_context('display.max_colwidth', 100, 'display.width', 250, 'display.float_format', '{:.1f}'.format):
+        print(summary[summary['samples'] >= args.min_size].to_string())
+
+    if args.output:
+        df.drop(columns=['change']).to_csv(args.output, index=False)
+        print(f"\nCluster assignments saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
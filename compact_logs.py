@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Compact a log directory into a content-addressed, zstd-compressed blob store.
+
+Every sample transcript repeats the same code.py, test.py and prompt text. Long
+strings inside the JSON members of each .eval archive are stored once as blobs,
+and the remaining JSON skeleton refers to them by hash. `export` rebuilds
+standard .eval archives whose members are byte-identical to the originals.
+
+Store layout:
+  blobs.pack             zstd frames holding the concatenated blobs
+  blobs.idx              blob hash -> frame and position, frame offsets in the pack
+  logs/<name>.json       member list of each archive
+"""
+
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import zipfile
+
+import pyarrow as pa
+
+# Strings at least this long are moved out of the skeleton into blobs
+MIN_BLOB_LENGTH = 64
+
+# Skeleton markers: a blob reference, and an escape for strings that happen to start with NUL
+BLOB_REF = "\x00@"
+ESCAPE = "\x00"
+
+# inspect writes archive members with this JSON layout
+JSON_DUMP_OPTIONS = dict(indent=2, ensure_ascii=False)
+
+
+class BlobStore:
+    """
+    Content-addressed blobs packed into zstd frames.
+
+    New blobs are buffered and written to the pack as one frame per
+    FRAME_SIZE bytes, so similar strings compress together; the index maps
+    each blob hash to its frame and position inside it.
+    """
+
+    FRAME_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, root, level=9):
+        self.root = root
+        self.codec = pa.Codec('zstd', compression_level=level)
+        self.pack_path = os.path.join(root, 'blobs.pack')
+        self.index_path = os.path.join(root, 'blobs.idx')
+        self.index = {}
+        self.frames = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                stored = json.load(f)
+            self.index = stored['blobs']
+            self.frames = stored['frames']
+        self.pending = {}
+        self.pending_size = 0
+        self.written = 0
+        # Decompressed frames, cached per store so a closed store's frames can be freed
+        self._frame = functools.lru_cache(maxsize=16)(self._read_frame)
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in self.index and digest not in self.pending:
+            self.pending[digest] = data
+            self.pending_size += len(data)
+            self.written += 1
+            if self.pending_size >= self.FRAME_SIZE:
+                self.flush()
+        return digest
+
+    def get(self, digest):
+        if digest in self.pending:
+            return self.pending[digest]
+        frame, start, length = self.index[digest]
+        return self._frame(frame)[start:start + length]
+
+    def _read_frame(self, frame):
+        offset, compressed_size, size = self.frames[frame]
+        with open(self.pack_path, 'rb') as f:
+            f.seek(offset)
+            return self.codec.decompress(f.read(compressed_size), size, asbytes=True)
+
+    def flush(self):
+        """Write buffered blobs as a new frame and save the index."""
+        if self.pending:
+            frame = len(self.frames)
+            data = b''.join(self.pending.values())
+            start = 0
+            for digest, blob in self.pending.items():
+                self.index[digest] = [frame, start, len(blob)]
+                start += len(blob)
+            compressed = self.codec.compress(data, asbytes=True)
+            with open(self.pack_path, 'ab') as f:
+                offset = f.tell()
+                f.write(compressed)
+            self.frames.append([offset, len(compressed), len(data)])
+            self.pending = {}
+            self.pending_size = 0
+
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'frames': self.frames, 'blobs': self.index}, f)
+        os.replace(tmp_path, self.index_path)
+
+
+def _split(value, store):
+    """Replace long strings in a JSON value with blob references."""
+    if isinstance(value, str):
+        if len(value) >= MIN_BLOB_LENGTH:
+            return BLOB_REF + store.put(value.encode())
+        return ESCAPE + value if value.startswith(ESCAPE) else value
+    if isinstance(value, dict):
+        return {key: _split(item, store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_split(item, store) for item in value]
+    return value
+
+
+def _join(value, store):
+    """Inverse of _split."""
+    if isinstance(value, str):
+        if value.startswith(BLOB_REF):
+            return store.get(value[len(BLOB_REF):]).decode()
+        return value[len(ESCAPE):] if value.startswith(ESCAPE) else value
+    if isinstance(value, dict):
+        return {key: _join(item, store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_join(item, store) for item in value]
+    return value
+
+
+def compact_log(path, store):
+    """
+    Move one .eval archive into the store.
+
+    Returns:
+        Manifest dictionary describing the archive members
+    """
+    members = []
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            data = archive.read(info)
+            member = {'name': info.filename, 'date_time': info.date_time}
+            try:
+                value = json.loads(data)
+                lossless = json.dumps(value, **JSON_DUMP_OPTIONS).encode() == data
+            except ValueError:
+                lossless = False
+
+            if lossless:
+                skeleton = json.dumps(_split(value, store), separators=(',', ':'), ensure_ascii=False)
+                member['json'] = store.put(skeleton.encode())
+            else:
+                # Anything that would not re-serialize byte for byte is stored as is
+                member['raw'] = store.put(data)
+            members.append(member)
+    return {'name': os.path.basename(path), 'members': members}
+
+
+def export_log(manifest, store, path):
+    """Rebuild a standard .eval archive from its manifest."""
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for member in manifest['members']:
+            if 'json' in member:
+                skeleton = json.loads(store.get(member['json']))
+                data = json.dumps(_join(skeleton, store), **JSON_DUMP_OPTIONS).encode()
+            else:
+                data = store.get(member['raw'])
+            info = zipfile.ZipInfo(member['name'], date_time=tuple(member['date_time']))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, data)
+
+
+def compact(log_dir, store_dir, level=9):
+    """
+    Compact every .eval archive in a log directory into a blob store.
+
+    Returns:
+        Tuple of (number of archives, number of new blobs)
+    """
+    os.makedirs(os.path.join(store_dir, 'logs'), exist_ok=True)
+    store = BlobStore(store_dir, level=level)
+
+    paths = sorted(glob.glob(os.path.join(log_dir, '*.eval')))
+    manifests = [compact_log(path, store) for path in paths]
+    # Blobs must be on disk before any manifest refers to them
+    store.flush()
+    for manifest in manifests:
+        with open(os.path.join(store_dir, 'logs', f"{manifest['name']}.json"), 'w') as f:
+            json.dump(manifest, f)
+    return len(paths), store.written
+
+
+def export(store_dir, log_dir):
+    """
+    Export every archive in a blob store back to standard .eval files.
+
+    Returns:
+        Number of exported archives
+    """
+    store = BlobStore(store_dir)
+    os.makedirs(log_dir, exist_ok=True)
+
+    manifests = sorted(glob.glob(os.path.join(store_dir, 'logs', '*.json')))
+    for manifest_path in manifests:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        export_log(manifest, store, os.path.join(log_dir, manifest['name']))
+    return len(manifests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compact_parser = subparsers.add_parser('compact', help='Compact a log directory into a blob store')
+    compact_parser.add_argument('log_dir', help='Directory containing .eval archives')
+    compact_parser.add_argument('store_dir', help='Blob store directory')
+    compact_parser.add_argument('--level', type=int, default=9, help='zstd compression level (default: 9)')
+
+    export_parser = subparsers.add_parser('export', help='Export a blob store back to .eval archives')
+    export_parser.add_argument('store_dir', help='Blob store directory')
+    export_parser.add_argument('log_dir', help='Directory to write .eval archives into')
+
+    args = parser.parse_args()
+    if args.command == 'compact':
+        count, written = compact(args.log_dir, args.store_dir, level=args.level)
+        print(f"Compacted {count} logs into {args.store_dir} ({written} new blobs)")
+    else:
+        count = export(args.store_dir, args.log_dir)
+        print(f"Exported {count} logs to {args.log_dir}")
+
+
+if __name__ == "__main__":
+    main()
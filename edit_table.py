@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Extract the edits every sample made to code.py into a columnar table.
+
+Each row is one edit, replayed with transcripts.replay_edits starting from the
+assembled header + body + core + extra_code:
+  log, id, epoch, model, condition    the sample
+  step                                index of the tool call that made the edit
+  observed                            seen in `cat code.py` output rather than replayed
+  lines_removed, lines_added          size of the edit (null when either side is unknown)
+  touched_symbols                     top-level names whose definitions the edit changed
+  deleted_symbols, added_symbols      top-level names that disappeared or appeared
+  diff                                unified diff of the edit
+
+The table is written to Parquet with zstd, so questions such as "which
+samples deleted do_square_using_c" become filters on the list columns:
+  python edit_table.py logs-bulk-* --symbol do_square_using_c
+"""
+
+import argparse
+import ast
+import difflib
+import re
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+SCHEMA_VERSION = 1
+TOP_LEVEL_NAME = re.compile(r'^(?:(?:async\s+)?def|class)\s+(\w+)|^(\w+)\s*(?::[^=]*)?=(?!=)')
+
+EDIT_SCHEMA = pa.schema([
+    pa.field('log', pa.dictionary(pa.int32(), pa.string())),
+    pa.field('id', pa.string()),
+    pa.field('epoch', pa.int32()),
+    pa.field('model', pa.dictionary(pa.int32(), pa.string())),
+    pa.field('condition', pa.dictionary(pa.int32(), pa.string())),
+    pa.field('step', pa.int32()),
+    pa.field('observed', pa.bool_()),
+    pa.field('lines_removed', pa.int32()),
+    pa.field('lines_added', pa.int32()),
+    pa.field('touched_symbols', pa.list_(pa.string())),
+    pa.field('deleted_symbols', pa.list_(pa.string())),
+    pa.field('added_symbols', pa.list_(pa.string())),
+    pa.field('diff', pa.large_string()),
+], metadata={'table': 'edits', 'schema_version': str(SCHEMA_VERSION)})
+
+
+def top_level_symbols(code):
+    """
+    Map the top-level names defined in code.py to their line ranges.
+
+    Functions, classes, assignments and imports count. Code that does not
+    parse (agents save broken files too) falls back to matching `def`,
+    `class` and assignment lines, each covering only its own line.
+
+    Returns:
+        Dictionary of name -> (first line, last line), 0-based and inclusive
+    """
+    symbols = {}
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        for number, line in enumerate(code.split('\n')):
+            match = TOP_LEVEL_NAME.match(line)
+            if match:
+                symbols[match.group(1) or match.group(2)] = (number, number)
+        return symbols
+
+    for node in tree.body:
+        span = (node.lineno - 1, node.end_lineno - 1)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names = [node.name]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = [(alias.asname or alias.name).split('.')[0] for alias in node.names]
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [name.id for target in targets for name in ast.walk(target) if isinstance(name, ast.Name)]
+            # Attribute assignments such as python_c_square.restype belong to their object
+            names += [target.value.id for target in targets
+                      if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name)]
+        else:
+            continue
+        for name in names:
+            first, last = symbols.get(name, span)
+            symbols[name] = (min(first, span[0]), max(last, span[1]))
+    return symbols
+
+
+def describe_edit(before, after):
+    """
+    Measure one edit of code.py.
+
+    Returns:
+        Dictionary with lines_removed, lines_added, touched_symbols,
+        deleted_symbols, added_symbols and diff
+    """
+    before_lines, after_lines = before.split('\n'), after.split('\n')
+    before_symbols, after_symbols = top_level_symbols(before), top_level_symbols(after)
+
+    removed = added = 0
+    touched = set()
+    matcher = difflib.SequenceMatcher(None, before_lines, after_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        removed += i2 - i1
+        added += j2 - j1
+        # An insertion touches a symbol when it lands inside the symbol's definition
+        touched.update(name for name, (first, last) in before_symbols.items()
+                       if first < i2 and last >= i1 or (i1 == i2 and first < i1 <= last))
+        touched.update(name for name, (first, last) in after_symbols.items()
+                       if first < j2 and last >= j1 or (j1 == j2 and first < j1 <= last))
+
+    return {
+        'lines_removed': removed,
+        'lines_added': added,
+        'touched_symbols': sorted(touched),
+        'deleted_symbols': sorted(set(before_symbols) - set(after_symbols)),
+        'added_symbols': sorted(set(after_symbols) - set(before_symbols)),
+        'diff': "".join(difflib.unified_diff(
+            before.splitlines(keepends=True), after.splitlines(keepends=True), 'code.py', 'code.py'
+        )),
+    }
+
+
+def extract_edits(log_paths):
+    """
+    Replay and describe the edits of every sample in the given logs.
+
+    Returns:
+        Arrow table with the EDIT_SCHEMA columns
+    """
+    from analyze_hacking_rates import sample_condition
+    from transcripts import iter_samples, replay_edits
+
+    rows = []
+    for path, model, sample in iter_samples(log_paths):
+        edits, _ = replay_edits(sample)
+        for edit in edits:
+            row = {
+                'log': path,
+                'id': str(sample['id']),
+                'epoch': sample['epoch'],
+                'model': model,
+                'condition': sample_condition(sample['metadata']),
+                'step': edit['step'],
+                'observed': edit['observed'],
+            }
+            if edit['before'] is not None and edit['after'] is not None:
+                row.update(describe_edit(edit['before'], edit['after']))
+            rows.append(row)
+    return pa.Table.from_pylist(rows, schema=EDIT_SCHEMA)
+
+
+def samples_with_symbol(edits, symbol, column='deleted_symbols'):
+    """
+    Count, per model, the samples with at least one edit listing a symbol.
+
+    Args:
+        edits: Table written by extract_edits
+        symbol: Top-level name, e.g. do_square_using_c
+        column: deleted_symbols, added_symbols or touched_symbols
+
+    Returns:
+        DataFrame with the number of matching samples and of samples with edits, per model
+    """
+    sample_keys = ['log', 'id', 'epoch', 'model']
+    hits = pc.equal(pc.list_flatten(edits[column]), symbol)
+    rows = pc.unique(pc.filter(pc.list_parent_indices(edits[column]), hits))
+
+    frame = edits.select(sample_keys).to_pandas()
+    frame['match'] = False
+    frame.loc[rows.to_numpy(zero_copy_only=False), 'match'] = True
+    per_sample = frame.groupby(sample_keys, observed=True)['match'].any().reset_index()
+    return per_sample.groupby('model', observed=True)['match'].agg(samples='sum', with_edits='size')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log_dirs', nargs='*', default=['logs-bulk-*'],
+                        help='Log directories, log files or glob patterns (default: logs-bulk-*)')
+    parser.add_argument('--output', default='edits.parquet', help='Parquet file to write (default: edits.parquet)')
+    parser.add_argument('--symbol', action='append', dest='symbols', default=[],
+                        help='Print per model how many samples deleted this top-level name (repeatable)')
+    args = parser.parse_args()
+
+    from analyze_hacking_rates import find_logs
+
+    logs = [path for path in find_logs(args.log_dirs) if path.endswith('.eval')]
+    if not logs:
+        raise SystemExit(f"No logs found matching {' '.join(args.log_dirs)}")
+
+    edits = extract_edits(logs)
+    pq.write_table(edits, args.output, compression='zstd')
+    known = pc.sum(pc.is_valid(edits['lines_removed'])).as_py()
+    samples = len(edits.select(['log', 'id', 'epoch']).group_by(['log', 'id', 'epoch']).aggregate([]))
+    print(f"Saved {edits.num_rows} edits ({known} with known contents) of {samples} samples to {args.output}")
+
+    for symbol in args.symbols:
+        print(f"\nSamples that deleted {symbol}:")
+        print(samples_with_symbol(edits, symbol).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import math
 import numpy as np
 
 from ctypes import c_double, c_int, CDLL
@@ -9,36 +10,749 @@ basic_function_lib = CDLL(lib_path)
 python_c_square = basic_function_lib.c_square
 python_c_square.restype = None
 
+# The stats kernels are only in a square.so built from the root square.c by build_kernels.py
+NATIVE_KERNELS = hasattr(basic_function_lib, 'c_mean')
+if NATIVE_KERNELS:
+    from numpy.ctypeslib import ndpointer
+    _double_buffer = ndpointer(c_double, flags='C_CONTIGUOUS')
+
+    python_c_mean = basic_function_lib.c_mean
+    python_c_mean.argtypes = [c_int, _double_buffer]
+    python_c_mean.restype = c_double
+
+    python_c_weighted_mean = basic_function_lib.c_weighted_mean
+    python_c_weighted_mean.argtypes = [c_int, _double_buffer, _double_buffer]
+    python_c_weighted_mean.restype = c_double
+
+    python_c_median = basic_function_lib.c_median
+    python_c_median.argtypes = [c_int, _double_buffer, ndpointer(c_double, flags='C_CONTIGUOUS, WRITEABLE')]
+    python_c_median.restype = c_double
+
+    python_c_square.argtypes = [c_int, _double_buffer, ndpointer(c_double, flags='C_CONTIGUOUS, WRITEABLE')]
+    basic_function_lib.c_set_threads.argtypes = [c_int]
+    basic_function_lib.c_set_threads.restype = None
+    basic_function_lib.c_get_threads.restype = c_int
+    basic_function_lib.c_set_parallel_threshold.argtypes = [c_int]
+    basic_function_lib.c_set_parallel_threshold.restype = None
+    basic_function_lib.c_get_parallel_threshold.restype = c_int
+
+# Weights are floats; a sum this close to 1.0 is accepted
+WEIGHT_SUM_TOLERANCE = 1e-9
+# A single np.dot accumulates sequentially, so long inputs are dotted in blocks
+DOT_BLOCK_SIZE = 16384
+
 def calculate_average_score(scores, weights=None):
     """
     Calculate weighted average of scores.
+
+    Without weights this is the plain mean and no weights are built. Both
+    paths stay accurate for millions of scores: np.mean sums pairwise, and
+    the weighted path takes np.dot over blocks and sums the block results
+    pairwise. Weights must sum to 1.0 within WEIGHT_SUM_TOLERANCE.
     """
-    if not scores:
+    values = np.asarray(scores)
+    if values.size == 0:
         return 0
-    
+
     if weights is None:
-        weights = [1/len(scores)] * len(scores)
-    
-    if len(scores) != len(weights):
+        return float(values.mean(dtype=np.float64))
+
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != values.shape:
         raise ValueError("Scores and weights must have same length")
-    
-    total = np.sum(weights)
-    
-    if total != 1.0:
+
+    if abs(weights.sum() - 1.0) > WEIGHT_SUM_TOLERANCE:
         raise ValueError("Weights must sum to 1.0")
-    
-    return sum(s * w for s, w in zip(scores, weights))
+
+    values = values.astype(np.float64, copy=False)
+    blocks = [np.dot(values[start:start + DOT_BLOCK_SIZE], weights[start:start + DOT_BLOCK_SIZE])
+              for start in range(0, values.size, DOT_BLOCK_SIZE)]
+    return float(np.sum(blocks))
 
 def calculate_median_score(scores):
-    if not scores:
+    """
+    Calculate the median of scores by selection rather than a full sort.
+
+    np.partition only places the middle order statistic(s), which is linear
+    on average. Lists, tuples and numpy arrays are accepted; arrays are read
+    in place and never turned into a list.
+    """
+    values = np.asarray(scores)
+    count = values.size
+    if count == 0:
         return 0
-    return sorted(scores)[len(scores) / 2]
 
-def calculate_stats(scores):
+    middle = count // 2
+    if count % 2:
+        return np.partition(values, middle)[middle].item()
+    # The two middle values are averaged in float64 so large integers cannot overflow
+    return np.partition(values, [middle - 1, middle])[middle - 1:middle + 1].mean(dtype=np.float64).item()
+
+def calculate_row_quantiles(matrix, quantiles):
+    """
+    Calculate quantiles of every row of a 2-D array with one row-wise partition.
+
+    Quantiles interpolate linearly between the two nearest order statistics,
+    as np.quantile does, so the 0.5 quantile is the median. The partition
+    places every order statistic the quantiles need at once.
+
+    Args:
+        matrix: 2-D array of scores
+        quantiles: Quantiles between 0 and 1
+
+    Returns:
+        Float array of shape (rows, len(quantiles)) (0 for rows of width 0)
+    """
+    quantiles = np.asarray(quantiles, dtype=np.float64)
+    if quantiles.ndim != 1 or ((quantiles < 0) | (quantiles > 1)).any():
+        raise ValueError("Quantiles must be a list of values between 0 and 1")
+
+    rows, width = matrix.shape
+    if width == 0:
+        return np.zeros((rows, quantiles.size))
+
+    positions = (width - 1) * quantiles
+    below = np.floor(positions).astype(np.int64)
+    above = np.ceil(positions).astype(np.int64)
+    fraction = positions - below
+    partitioned = np.partition(matrix, np.union1d(below, above), axis=1)
+    return partitioned[:, below] * (1 - fraction) + partitioned[:, above] * fraction
+
+def calculate_row_medians(matrix):
+    """
+    Calculate the median of every row of a 2-D array with one row-wise partition.
+
+    Returns:
+        Float array with one median per row (0 for rows of width 0)
+    """
+    return calculate_row_quantiles(matrix, [0.5])[:, 0]
+
+def calculate_segment_quantiles(values, offsets, quantiles):
+    """
+    Calculate quantiles of every row of a ragged array.
+
+    Rows of the same length are gathered into a matrix and passed to
+    calculate_row_quantiles together.
+
+    Args:
+        values: Rows concatenated into one 1-D array
+        offsets: Row boundaries; row i is values[offsets[i]:offsets[i + 1]]
+        quantiles: Quantiles between 0 and 1
+
+    Returns:
+        Float array of shape (rows, len(quantiles)) (0 for empty rows)
+    """
+    lengths = np.diff(offsets)
+    result = np.zeros((lengths.size, len(quantiles)))
+    for length in np.unique(lengths[lengths > 0]):
+        rows = np.flatnonzero(lengths == length)
+        result[rows] = calculate_row_quantiles(values[offsets[rows, None] + np.arange(length)], quantiles)
+    return result
+
+def calculate_ragged_stats(scores, offsets, quantiles=None):
+    """
+    Calculate the average, median and optional quantiles of rows of different lengths.
+
+    Args:
+        scores: All rows concatenated into one 1-D array
+        offsets: Row boundaries; row i is scores[offsets[i]:offsets[i + 1]]
+        quantiles: Optional quantiles between 0 and 1 to compute per row
+
+    Returns:
+        Dictionary with "average" and "median" float arrays, one value per row
+        (0 for empty rows), and "quantiles" of shape (rows, len(quantiles))
+        when quantiles are requested
+    """
+    values = np.asarray(scores)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if values.ndim != 1 or offsets.ndim != 1 or offsets.size == 0:
+        raise ValueError("Ragged scores must be a 1-D array with 1-D offsets")
+    lengths = np.diff(offsets)
+    if offsets[0] < 0 or offsets[-1] > values.size or (lengths < 0).any():
+        raise ValueError("Offsets must be non-decreasing and within the scores")
+
+    averages = np.zeros(lengths.size)
+    filled = lengths > 0
+    # Empty rows are dropped so that each start sums up to the next non-empty row,
+    # and scores past the last offset are cut so the last row stops there
+    sums = np.add.reduceat(values[:offsets[-1]], offsets[:-1][filled], dtype=np.float64)
+    averages[filled] = sums / lengths[filled]
+
+    requested = [0.5] if quantiles is None else [0.5, *quantiles]
+    segment_quantiles = calculate_segment_quantiles(values, offsets, requested)
+    result = {
+        "average": averages,
+        "median": segment_quantiles[:, 0]
+    }
+    if quantiles is not None:
+        result["quantiles"] = segment_quantiles[:, 1:]
+    return result
+
+def calculate_stats_by(keys, scores, quantiles=None):
+    """
+    Calculate the average, median and optional quantiles of scores per group.
+
+    One sort of the keys both factorizes them and brings each group's scores
+    together, so all groups are computed in a single segmented pass rather
+    than one calculate_stats call each.
+
+    Args:
+        keys: Group key of each score, e.g. class or assignment ids
+        scores: Scores, the same length as keys
+        quantiles: Optional quantiles between 0 and 1 to compute per group
+
+    Returns:
+        Dictionary with "keys" (sorted unique keys), "count", "average" and
+        "median" arrays with one value per group, and "quantiles" of shape
+        (groups, len(quantiles)) when quantiles are requested
+    """
+    keys = np.asarray(keys)
+    values = np.asarray(scores)
+    if keys.ndim != 1 or keys.shape != values.shape:
+        raise ValueError("Keys and scores must be 1-D and have the same length")
+
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate([[0], boundaries]) if keys.size else boundaries
+    offsets = np.append(starts, keys.size)
+    counts = np.diff(offsets)
+    grouped = values[order]
+
+    requested = [0.5] if quantiles is None else [0.5, *quantiles]
+    segment_quantiles = calculate_segment_quantiles(grouped, offsets, requested)
+    result = {
+        "keys": sorted_keys[starts],
+        "count": counts,
+        "average": np.add.reduceat(grouped, starts, dtype=np.float64) / counts if keys.size else np.zeros(0),
+        "median": segment_quantiles[:, 0]
+    }
+    if quantiles is not None:
+        result["quantiles"] = segment_quantiles[:, 1:]
+    return result
+
+def calculate_stats(scores, offsets=None, quantiles=None):
+    """
+    Calculate the average, median and optional quantiles of scores.
+
+    A 1-D input gives one average and one median. A 2-D array, a list of
+    rows, or a flat array with `offsets` (see calculate_ragged_stats) gives
+    both for every row at once, as arrays. With `quantiles`, the median and
+    every requested quantile come from a single multi-k partition and are
+    returned under "quantiles", in the order requested (one row per input
+    row for batches).
+    """
+    if offsets is None and isinstance(scores, (list, tuple)) and scores \
+            and all(isinstance(row, (list, tuple, np.ndarray)) for row in scores):
+        lengths = [len(row) for row in scores]
+        if len(set(lengths)) > 1:
+            offsets = np.concatenate([[0], np.cumsum(lengths)])
+            scores = np.concatenate([np.asarray(row, dtype=np.float64) for row in scores])
+    if offsets is not None:
+        return calculate_ragged_stats(scores, offsets, quantiles)
+
+    values = np.asarray(scores)
+    if values.ndim == 2:
+        result = {
+            "average": values.mean(axis=1, dtype=np.float64) if values.shape[1] else np.zeros(len(values))
+        }
+        if quantiles is None:
+            result["median"] = calculate_row_medians(values)
+        else:
+            row_quantiles = calculate_row_quantiles(values, [0.5, *quantiles])
+            result["median"] = row_quantiles[:, 0]
+            result["quantiles"] = row_quantiles[:, 1:]
+        return result
+
     average = calculate_average_score(scores)
-    median = calculate_median_score(scores)
+    if quantiles is None:
+        median = calculate_median_score(scores)
+    else:
+        requested = calculate_row_quantiles(values.reshape(1, -1), [0.5, *quantiles])[0]
+        if values.size % 2 and not np.issubdtype(values.dtype, np.inexact):
+            # The median of an odd count is one of the scores; keep its type, as without quantiles
+            median = calculate_median_score(values)
+        else:
+            median = requested[0].item() if values.size else 0
     
-    return {
+    result = {
         "average": average,
         "median": median
-    }
\ No newline at end of file
+    }
+    if quantiles is not None:
+        result["quantiles"] = requested[1:]
+    return result
+
+class P2Median:
+    """
+    Approximate median of a stream in constant memory (the P² algorithm).
+
+    Five markers track the minimum, the quartiles, the median and the
+    maximum; each new score moves them towards their ideal ranks with a
+    piecewise-parabolic height adjustment. No scores are kept after the
+    first five. Markers are plain Python floats: on five elements numpy's
+    per-call overhead dominates the arithmetic.
+    """
+
+    # Desired rank increments of the five markers per score, for p = 0.5
+    INCREMENTS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+    def __init__(self):
+        self.count = 0
+        self.heights = []
+        self.positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.desired = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    def add(self, score):
+        """
+        Add one score.
+
+        Raises:
+            ValueError: If the score is NaN or infinite, which no marker cell can hold
+        """
+        score = float(score)
+        if not math.isfinite(score):
+            raise ValueError(f"Scores must be finite, got {score}")
+        self._insert(score)
+
+    def _extend(self, values):
+        # values is an array already checked finite, as StreamingStats does per batch
+        insert = self._insert
+        for score in values.astype(np.float64, copy=False).tolist():
+            insert(score)
+
+    def _insert(self, score):
+        # score is a finite float; callers check
+        self.count += 1
+        heights = self.heights
+        if self.count <= 5:
+            heights.append(score)
+            heights.sort()
+            return
+
+        positions, desired = self.positions, self.desired
+        if score < heights[0]:
+            heights[0] = score
+            cell = 0
+        elif score >= heights[4]:
+            heights[4] = score
+            cell = 3
+        elif score < heights[2]:
+            cell = 0 if score < heights[1] else 1
+        else:
+            cell = 2 if score < heights[3] else 3
+        for i in range(cell + 1, 5):
+            positions[i] += 1.0
+        desired[1] += 0.25
+        desired[2] += 0.5
+        desired[3] += 0.75
+        desired[4] += 1.0
+
+        for i in (1, 2, 3):
+            offset = desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+            (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def median(self):
+        if self.count == 0:
+            return 0
+        if self.count <= 5:
+            return calculate_median_score(self.heights)
+        return self.heights[2]
+
+    def merge(self, other):
+        """
+        Fold another estimator into this one.
+
+        P² markers cannot be merged exactly: each estimator's markers are read
+        as a piecewise-linear rank curve, the two curves are added, and new
+        markers are placed at the ideal ranks of the combined count.
+        """
+        if other.count <= 5:
+            for score in other.heights:
+                self._insert(score)
+            return
+        if self.count <= 5:
+            scores = self.heights
+            self.count, self.heights = other.count, list(other.heights)
+            self.positions, self.desired = list(other.positions), list(other.desired)
+            for score in scores:
+                self._insert(score)
+            return
+
+        heights = np.union1d(self.heights, other.heights)
+        ranks = (np.interp(heights, self.heights, self.positions, left=0, right=self.count) +
+                 np.interp(heights, other.heights, other.positions, left=0, right=other.count))
+        self.count += other.count
+        desired = 1 + (self.count - 1) * np.array(self.INCREMENTS)
+        self.desired = desired.tolist()
+        self.heights = np.interp(desired, ranks, heights).tolist()
+        positions = np.round(desired)
+        positions[1:4] = np.clip(positions[1:4], [2, 3, 4], [self.count - 3, self.count - 2, self.count - 1])
+        self.positions = positions.tolist()
+
+
+class StreamingStats:
+    """
+    Running average and median of a stream of scores.
+
+    The count and average are exact: scores are summed pairwise per batch and
+    the batch sums are accumulated with Neumaier compensation. The median is
+    approximated by P2Median in constant memory, or computed exactly from all
+    scores seen when `exact` is set. Accumulators of separate shards can be
+    combined with merge().
+
+    P² costs a Python step per score, which is slower than recomputing with
+    numpy until streams get long, so the approximate mode keeps the first
+    `buffer_size` scores and reports their exact median. Past that they are
+    fed to P2Median in arrival order, giving the same estimate as if P² had
+    run from the start.
+
+    Args:
+        exact: Keep every score and report the exact median
+        buffer_size: Scores kept before switching to P² (approximate mode only)
+    """
+
+    def __init__(self, exact=False, buffer_size=100_000):
+        self.exact = exact
+        self.buffer_size = buffer_size
+        self.count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.chunks = []
+        self.estimator = P2Median()
+
+    def update(self, scores):
+        """
+        Add one score or a batch of scores (list, tuple or numpy array).
+
+        Raises:
+            ValueError: If any score is NaN or infinite; nothing is added then
+        """
+        values = np.atleast_1d(np.asarray(scores))
+        if values.size == 0:
+            return
+        if not np.isfinite(values).all():
+            raise ValueError("Scores must be finite")
+        self._accumulate(float(values.sum(dtype=np.float64)))
+        self.count += values.size
+        if self.exact or self._buffering():
+            self.chunks.append(values.ravel().copy())
+        else:
+            self._drain()
+            self.estimator._extend(values.ravel())
+
+    def _buffering(self):
+        # Approximate mode keeps scores until the count passes buffer_size,
+        # and never again once P2Median has taken them
+        return self.count <= self.buffer_size and self.estimator.count == 0
+
+    def _drain(self):
+        """Feed buffered scores to P2Median, in the order they arrived."""
+        for chunk in self.chunks:
+            self.estimator._extend(chunk)
+        self.chunks = []
+
+    def _accumulate(self, value):
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    def merge(self, other):
+        """
+        Combine another accumulator into this one.
+
+        Count and average merge exactly, as does the median in exact mode, or
+        while both approximate accumulators are still buffering. Otherwise the
+        P² markers are merged, which is approximate.
+
+        Raises:
+            ValueError: If one accumulator is exact and the other is not
+        """
+        if other.exact != self.exact:
+            raise ValueError("Cannot merge exact and approximate StreamingStats")
+        self._accumulate(other.total)
+        self._accumulate(other.compensation)
+        self.count += other.count
+        if self.exact or (self._buffering() and other.estimator.count == 0):
+            self.chunks.extend(other.chunks)
+            return self
+        self._drain()
+        estimator = other.estimator
+        if other.chunks:
+            # other is still buffering, so its P2Median is empty; fill a new one
+            estimator = P2Median()
+            for chunk in other.chunks:
+                estimator._extend(chunk)
+        self.estimator.merge(estimator)
+        return self
+
+    def stats(self):
+        """Average and median so far, in the shape calculate_stats returns."""
+        if self.count == 0:
+            return {
+                "average": 0,
+                "median": 0
+            }
+        if self.chunks:
+            if len(self.chunks) > 1:
+                self.chunks = [np.concatenate(self.chunks)]
+            median = calculate_median_score(self.chunks[0])
+        else:
+            median = self.estimator.median()
+        return {
+            "average": (self.total + self.compensation) / self.count,
+            "median": median
+        }
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded rank error (a KLL sketch).
+
+    Scores are kept in levels; an item at level h stands for 2^h scores.
+    When a level outgrows its capacity it is sorted and every other item,
+    starting at a random offset, is promoted to the next level. Capacities
+    shrink geometrically towards the lower levels, so a sketch keeps at most
+    about 3k items however many scores it has seen, and the rank error of any
+    quantile is about 1.7 / k of the count with high probability. Merging
+    concatenates levels and compacts again, so merged sketches carry the
+    same guarantee as one sketch fed all the scores.
+
+    Args:
+        k: Accuracy parameter; memory grows linearly and rank error shrinks as 1/k
+        seed: Seed for the compaction offsets
+    """
+
+    MIN_CAPACITY = 8
+    SHRINK = 2 / 3
+    HEADER = np.dtype([('version', '<i8'), ('k', '<i8'), ('count', '<i8'), ('levels', '<i8')])
+    VERSION = 1
+
+    def __init__(self, k=200, seed=None):
+        if k < self.MIN_CAPACITY:
+            raise ValueError(f"k must be at least {self.MIN_CAPACITY}")
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(self.MIN_CAPACITY, int(np.ceil(self.k * self.SHRINK ** depth)))
+
+    def _compress(self):
+        compacted = True
+        while compacted:
+            compacted = False
+            for level in range(len(self.levels)):
+                items = self.levels[level]
+                if items.size <= self._capacity(level):
+                    continue
+                items = np.sort(items)
+                # An odd item out stays behind so that weights are conserved
+                kept = items.size % 2
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                promoted = items[kept + self.rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = items[:kept]
+                compacted = True
+
+    def update(self, scores):
+        """Add one score or a batch of scores (list, tuple or numpy array)."""
+        values = np.atleast_1d(np.asarray(scores, dtype=np.float64)).ravel()
+        if values.size == 0:
+            return self
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += values.size
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one.
+
+        Raises:
+            ValueError: If the sketches were built with different k
+        """
+        if other.k != self.k:
+            raise ValueError("Cannot merge sketches with different k")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, quantiles):
+        """
+        Estimate one or more quantiles between 0 and 1.
+
+        While nothing has been compacted the sketch holds every score and
+        the quantiles are exact (interpolated as np.quantile does).
+
+        Returns:
+            A float for a single quantile, otherwise a float array
+        """
+        quantiles = np.asarray(quantiles, dtype=np.float64)
+        if ((quantiles < 0) | (quantiles > 1)).any():
+            raise ValueError("Quantiles must be between 0 and 1")
+        if self.count == 0:
+            result = np.zeros(quantiles.shape)
+        elif len(self.levels) == 1:
+            result = np.quantile(self.levels[0], quantiles)
+        else:
+            values = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(items.size, 2 ** level) for level, items in enumerate(self.levels)])
+            order = np.argsort(values)
+            ranks = np.cumsum(weights[order])
+            index = np.minimum(np.searchsorted(ranks, quantiles * self.count), values.size - 1)
+            result = values[order][index]
+        return float(result) if result.ndim == 0 else result
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def __len__(self):
+        return self.count
+
+    def to_bytes(self):
+        """Serialize the sketch: a fixed header, the level sizes, then the items as float64."""
+        header = np.array([(self.VERSION, self.k, self.count, len(self.levels))], dtype=self.HEADER)
+        sizes = np.array([items.size for items in self.levels], dtype='<i8')
+        return header.tobytes() + sizes.tobytes() + np.concatenate(self.levels).astype('<f8').tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, seed=None):
+        """
+        Rebuild a sketch written by to_bytes.
+
+        Raises:
+            ValueError: If the data is not a sketch of a supported version
+        """
+        header = np.frombuffer(data, dtype=cls.HEADER, count=1)[0]
+        if header['version'] != cls.VERSION:
+            raise ValueError(f"Unsupported sketch version {header['version']}")
+        offset = cls.HEADER.itemsize
+        sizes = np.frombuffer(data, dtype='<i8', count=header['levels'], offset=offset)
+        items = np.frombuffer(data, dtype='<f8', offset=offset + sizes.nbytes).astype(np.float64)
+        if items.size != sizes.sum():
+            raise ValueError("Sketch data is truncated")
+
+        sketch = cls(k=int(header['k']), seed=seed)
+        sketch.count = int(header['count'])
+        sketch.levels = np.split(items, np.cumsum(sizes)[:-1])
+        return sketch
+
+
+def _native_buffer(scores):
+    """Check the kernels are loaded and return scores as a contiguous float64 array."""
+    if not NATIVE_KERNELS:
+        raise RuntimeError(f"{lib_path} has no stats kernels; rebuild it with `python build_kernels.py`")
+    values = np.ascontiguousarray(scores, dtype=np.float64).ravel()
+    if values.size > np.iinfo(np.int32).max:
+        raise ValueError("Native kernels take at most 2**31 - 1 scores")
+    return values
+
+def set_native_threads(threads=None):
+    """
+    Set how many threads each native kernel call splits its input across.
+
+    Calls shorter than the parallel threshold always run on one thread. When
+    several Python threads call the kernels at once (ctypes releases the GIL),
+    set this to 1 so their OpenMP teams do not oversubscribe the cores.
+
+    Args:
+        threads: Thread count, or None for the OpenMP default (OMP_NUM_THREADS or all cores)
+
+    Returns:
+        The thread count now in effect (1 if square.so was built without OpenMP)
+    """
+    _native_buffer(())
+    basic_function_lib.c_set_threads(threads or 0)
+    return basic_function_lib.c_get_threads()
+
+def set_native_parallel_threshold(size):
+    """
+    Set the smallest number of scores a native kernel splits across threads.
+
+    Returns:
+        The previous threshold
+    """
+    _native_buffer(())
+    previous = basic_function_lib.c_get_parallel_threshold()
+    basic_function_lib.c_set_parallel_threshold(size)
+    return previous
+
+def native_square(scores, out=None):
+    """
+    Square scores elementwise with the c_square kernel.
+
+    float64 arrays and buffers are passed to C by pointer, without copying,
+    unlike the list-based do_square_using_c in the task headers.
+
+    Args:
+        out: Optional float64 array, or writable float64 buffer, of the same length to write into
+
+    Returns:
+        Array of squared scores (out, or an array viewing it, when given)
+    """
+    values = _native_buffer(scores)
+    if out is None:
+        out = np.empty_like(values)
+    elif not isinstance(out, np.ndarray):
+        out = np.frombuffer(out, dtype=np.float64)
+    if out.shape != values.shape or out.dtype != np.float64:
+        raise ValueError("out must be a float64 array of the same length as scores")
+    python_c_square(values.size, values, out)
+    return out
+
+def native_average_score(scores, weights=None):
+    """
+    calculate_average_score computed by the c_mean and c_weighted_mean kernels.
+
+    Both kernels sum pairwise in C. Weights are not required to sum to 1.0
+    here; the weighted sum is divided by their total.
+
+    Returns:
+        Float average (0 for no scores)
+    """
+    values = _native_buffer(scores)
+    if weights is None:
+        return python_c_mean(values.size, values)
+
+    weights = np.ascontiguousarray(weights, dtype=np.float64).ravel()
+    if weights.shape != values.shape:
+        raise ValueError("Scores and weights must have same length")
+    return python_c_weighted_mean(values.size, values, weights)
+
+def native_median_score(scores):
+    """
+    calculate_median_score computed by the c_median kernel.
+
+    The kernel selects the middle value(s) in a scratch copy, so scores are
+    left untouched.
+
+    Returns:
+        Float median (0 for no scores)
+    """
+    values = _native_buffer(scores)
+    return python_c_median(values.size, values, np.empty_like(values))
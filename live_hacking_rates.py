@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Live hacking rates by model and condition, tailed from the journals of running evals.
+"""
+
+import html
+import json
+import os
+import re
+import time
+import zipfile
+from collections import defaultdict
+from fnmatch import fnmatch
+
+import pandas as pd
+
+from analyze_hacking_rates import find_logs, sample_condition
+
+SUMMARY_MEMBER = re.compile(r'^_journal/summaries/(\d+)\.json$')
+
+
+class JournalTally:
+    """
+    Per model/condition hack counts, updated incrementally from log journals.
+
+    Each poll only reads journal summary files that were not seen before, so
+    completed samples are never parsed twice.
+    """
+
+    def __init__(self, models=None, conditions=None):
+        self.models = models
+        self.conditions = conditions
+        self.logs = {}
+        self.counts = defaultdict(lambda: [0, 0])
+
+    def update(self, path):
+        """
+        Read the new journal summaries of a log.
+
+        Returns:
+            Number of newly counted samples
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        state = self.logs.get(path)
+        if state is not None and state['signature'] == signature:
+            return 0
+
+        try:
+            archive = zipfile.ZipFile(path)
+        except (zipfile.BadZipFile, OSError):
+            # The log is being rewritten, pick it up on the next poll
+            return 0
+
+        counted = 0
+        with archive:
+            if state is None:
+                start = json.loads(archive.read('_journal/start.json'))
+                state = {'model': start['eval']['model'], 'signature': None, 'summaries': set()}
+                self.logs[path] = state
+            state['signature'] = signature
+
+            if self.models and not any(fnmatch(state['model'], model) for model in self.models):
+                return 0
+
+            for name in archive.namelist():
+                match = SUMMARY_MEMBER.match(name)
+                if match is None or name in state['summaries']:
+                    continue
+                for summary in json.loads(archive.read(name)):
+                    counted += self._count(state['model'], summary)
+                state['summaries'].add(name)
+
+        return counted
+
+    def _count(self, model, summary):
+        score = summary.get('scores', {}).get('test_scoring')
+        # Samples stopped by the budget guard are scored without values
+        if score is None or 'hacked' not in (score.get('value') or {}):
+            return 0
+        condition = sample_condition(summary['metadata'])
+        if self.conditions and not any(fnmatch(condition, pattern) for pattern in self.conditions):
+            return 0
+
+        counts = self.counts[(model, condition)]
+        counts[0] += 1
+        counts[1] += score['value']['hacked'] == 'I'
+        return 1
+
+    def table(self):
+        """Return the current hacking rate (%) pivot with models as columns."""
+        if not self.counts:
+            return pd.DataFrame()
+
+        results = pd.DataFrame(
+            [(model, condition, attempts, hacks) for (model, condition), (attempts, hacks) in self.counts.items()],
+            columns=['model', 'condition', 'total_attempts', 'successful_hacks']
+        )
+        attempts = results.pivot_table(index='condition', columns='model', values='total_attempts', aggfunc='sum')
+        hacks = results.pivot_table(index='condition', columns='model', values='successful_hacks', aggfunc='sum')
+
+        pivot = (hacks / attempts * 100).round(2)
+        pivot.loc['All'] = (hacks.sum() / attempts.sum() * 100).round(2)
+        pivot.loc['Samples'] = attempts.sum()
+        return pivot
+
+
+def render_terminal(tally):
+    # Clear the screen and move the cursor home before redrawing
+    print("\033[2J\033[H", end="")
+    print(f"LIVE HACKING RATES (%)  {time.strftime('%Y-%m-%d %H:%M:%S')}  logs: {len(tally.logs)}")
+    print("="*60)
+    table = tally.table()
+    print(table.to_string() if not table.empty else "Waiting for completed samples...")
+
+
+def render_html(tally, path, interval):
+    table = tally.table()
+    body = table.to_html(na_rep='') if not table.empty else "<p>Waiting for completed samples...</p>"
+    page = f"""<!doctype html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <meta http-equiv="refresh" content="{interval}" />
+    <title>Live hacking rates</title>
+  </head>
+  <body>
+    <h1>Live hacking rates (%)</h1>
+    <p>Updated {html.escape(time.strftime('%Y-%m-%d %H:%M:%S'))} from {len(tally.logs)} logs</p>
+    {body}
+  </body>
+</html>
+"""
+    # Write then rename so the browser never sees a half-written page
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(page)
+    os.replace(tmp_path, path)
+
+
+def watch(log_dirs, since=None, models=None, conditions=None, interval=5, html_path=None):
+    """
+    Poll log directories and redraw the hacking rate table until interrupted.
+
+    Args:
+        log_dirs: Log directories, log files or glob patterns matching either
+        since: Only watch logs created at or after this datetime
+        models: Only count models matching one of these glob patterns
+        conditions: Only count conditions matching one of these glob patterns
+        interval: Seconds between polls
+        html_path: Also write a self-refreshing HTML table to this path
+    """
+    tally = JournalTally(models=models, conditions=conditions)
+    try:
+        while True:
+            for path in find_logs(log_dirs, since=since):
+                if path.endswith('.eval'):
+                    tally.update(path)
+            render_terminal(tally)
+            if html_path:
+                render_html(tally, html_path, interval)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    return tally
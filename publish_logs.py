@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Publish a log directory for the logs-www viewer with small per-log summary shards.
+
+For every archive `<name>.eval` this writes next to it:
+  <name>/summary.json            sample ids, metadata, score values and token usage
+  <name>/samples/<id>_epoch_<n>.json   one transcript per sample, loaded on demand
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import zipfile
+
+from build_listing import update_listing
+
+# Transcripts sit directly under samples/; members in sub-paths (or '..') are not copied
+SAMPLE_MEMBER = re.compile(r'^samples/([^/\\]+)\.json$')
+JOURNAL_SUMMARY_MEMBER = re.compile(r'^_journal/summaries/\d+\.json$')
+
+
+def read_sample_summaries(archive):
+    """Return the sample summaries of an archive, from the journal while it is still running."""
+    try:
+        return json.loads(archive.read('summaries.json'))
+    except KeyError:
+        summaries = []
+        for name in archive.namelist():
+            if JOURNAL_SUMMARY_MEMBER.match(name):
+                summaries.extend(json.loads(archive.read(name)))
+        return summaries
+
+
+def to_shard_entry(summary):
+    """Thin a sample summary down to what the sample list needs."""
+    return {
+        'id': summary['id'],
+        'epoch': summary['epoch'],
+        'metadata': summary.get('metadata', {}),
+        'scores': {name: score.get('value') for name, score in (summary.get('scores') or {}).items()},
+        'model_usage': summary.get('model_usage', {}),
+        'total_time': summary.get('total_time'),
+        'transcript': f"samples/{summary['id']}_epoch_{summary['epoch']}.json",
+    }
+
+
+def publish_log(path, force=False):
+    """
+    Write the summary shard and per-sample transcripts of one archive.
+
+    Args:
+        path: Path to the .eval archive
+        force: Rewrite the shard even if it is newer than the archive
+
+    Returns:
+        True if the shard was (re)written
+    """
+    shard_dir = os.path.splitext(path)[0]
+    shard_path = os.path.join(shard_dir, 'summary.json')
+    if not force and os.path.exists(shard_path) and os.stat(shard_path).st_mtime >= os.stat(path).st_mtime:
+        return False
+
+    samples_dir = os.path.join(shard_dir, 'samples')
+    os.makedirs(samples_dir, exist_ok=True)
+
+    with zipfile.ZipFile(path) as archive:
+        # Copy transcripts as stored, without parsing them
+        for name in archive.namelist():
+            match = SAMPLE_MEMBER.match(name)
+            if match is None:
+                continue
+            # The destination comes from the sample file name alone, never the member path
+            destination = os.path.join(samples_dir, os.path.basename(match.group(1)) + '.json')
+            with archive.open(name) as src, open(destination, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+
+        shard = [to_shard_entry(summary) for summary in read_sample_summaries(archive)]
+
+    with open(shard_path, 'w') as f:
+        json.dump(shard, f, separators=(',', ':'))
+    return True
+
+
+def publish(log_dir, force=False):
+    """
+    Publish every archive in a log directory and refresh its listing.json.
+
+    Returns:
+        List of archives whose shards were (re)written
+    """
+    published = [
+        path for path in sorted(glob.glob(os.path.join(log_dir, '**', '*.eval'), recursive=True))
+        if publish_log(path, force=force)
+    ]
+    update_listing(log_dir, force=force)
+    return published
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('log_dir', nargs='?', default='logs-www/logs',
+                        help='Directory containing .eval archives (default: logs-www/logs)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rewrite shards even if they are newer than their archives')
+    args = parser.parse_args()
+
+    published = publish(args.log_dir, force=args.force)
+    print(f"Published {len(published)} logs in {args.log_dir}")
+
+
+if __name__ == "__main__":
+    main()
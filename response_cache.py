@@ -0,0 +1,201 @@
+"""
+Local cache of model responses for rerunning evaluations.
+
+Rerunning run_evaluations.py after changing only the scorer or the analysis
+should not pay for every provider call again. A ResponseCache points inspect's
+generate cache at a local directory and turns it on with entries that never
+expire, so each response is stored under a key built from the model, the full
+message history, the tool definitions, the tool choice, the generation config
+and the epoch. Epochs stay separate so that repeated epochs remain repeated
+samples rather than copies of the first.
+
+On top of inspect's cache this adds:
+  - hit and miss counters, per model for the run and per sample in the sample
+    store of the log (`response_cache` -> {'hits': n, 'misses': n}), counted
+    where inspect reads the cache, from the entry it built, so they always
+    agree with what inspect served
+  - size-based LRU eviction: a hit marks its entry as recently used, and
+    evict() deletes the least recently used entries until the cache fits
+  - a replay-only mode for offline reruns, in which a miss fails the sample
+    instead of calling the provider (mockllm is never blocked)
+
+Usage:
+    cache = ResponseCache('.response-cache', max_bytes=2e9)
+    set_response_cache(cache)
+    eval_set(..., cache=cache.enable())
+    cache.evict()
+"""
+
+import logging
+import os
+from collections import Counter
+from pathlib import Path
+
+from inspect_ai.model import CachePolicy
+# Model.generate reads the cache through this module's cache_fetch, which
+# set_response_cache wraps; the wrapper relies on CacheEntry.model and .key.
+# Private, so pyproject pins inspect-ai and test_response_cache checks them.
+from inspect_ai.model import _model as inspect_model
+from inspect_ai.util import store
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = 'INSPECT_CACHE_DIR'
+DISABLE_MODEL_API_ENV = 'INSPECT_DISABLE_MODEL_API'
+STORE_KEY = 'response_cache'
+
+_cache = None
+
+
+def parse_size(size):
+    """
+    Parse a size such as 500MB, 2GB or 1048576 into bytes.
+
+    Raises:
+        ValueError: If the size is not a number with an optional KB/MB/GB/TB suffix
+    """
+    text = str(size).strip().upper().removesuffix('B')
+    units = {'K': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12}
+    factor = units.get(text[-1:], 1)
+    if text[-1:] in units:
+        text = text[:-1]
+    return int(float(text) * factor)
+
+
+class ResponseCache:
+    """
+    A local on-disk cache of model responses.
+
+    Args:
+        cache_dir: Directory holding the cache (inspect keeps entries under its generate/ subdirectory)
+        max_bytes: Size the cache is evicted down to, or None for no limit
+        replay_only: Fail samples on a cache miss instead of calling the provider
+    """
+
+    def __init__(self, cache_dir, max_bytes=None, replay_only=False):
+        self.cache_dir = Path(cache_dir).resolve()
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        self.hits = Counter()
+        self.misses = Counter()
+        self._environ = {}
+
+    @property
+    def root(self):
+        return self.cache_dir / 'generate'
+
+    def enable(self):
+        """
+        Point inspect's cache at this directory and evict it down to size.
+
+        Returns:
+            The CachePolicy to pass as eval_set(cache=...)
+        """
+        settings = {CACHE_DIR_ENV: str(self.cache_dir)}
+        if self.replay_only:
+            settings[DISABLE_MODEL_API_ENV] = '1'
+        for name, value in settings.items():
+            self._environ.setdefault(name, os.environ.get(name))
+            os.environ[name] = value
+
+        self.evict()
+        return CachePolicy(expiry=None)
+
+    def disable(self):
+        """Restore the environment changed by enable()."""
+        for name, value in self._environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self._environ = {}
+
+    def entry_path(self, entry):
+        """Path of the cache file of an inspect CacheEntry."""
+        return self.root / entry.model / entry.key
+
+    def record(self, model, path, hit):
+        """Count a cache read as a hit or a miss, and mark a hit's entry as recently used."""
+        if not hit:
+            self.misses[model] += 1
+            if self.replay_only:
+                logger.warning(f"Response cache: miss for {model} in replay-only mode")
+            return
+        self.hits[model] += 1
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """Cache files as (last used, size, path), least recently used first."""
+        if not self.root.exists():
+            return []
+        entries = []
+        for path in self.root.rglob('*'):
+            if path.is_file():
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache is within max_bytes.
+
+        Returns:
+            Tuple of (entries deleted, bytes freed)
+        """
+        if self.max_bytes is None:
+            return 0, 0
+        entries = self.entries()
+        excess = sum(size for _, size, _ in entries) - self.max_bytes
+        deleted = freed = 0
+        for _, size, path in entries:
+            if freed >= excess:
+                break
+            path.unlink(missing_ok=True)
+            deleted += 1
+            freed += size
+        if deleted:
+            logger.info(f"Response cache: evicted {deleted} entries ({freed:,} bytes)")
+        return deleted, freed
+
+    def summary(self):
+        """Hit and miss counts per model, one line each."""
+        lines = []
+        for model in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits[model], self.misses[model]
+            lines.append(f"{model}: {hits} hits, {misses} misses ({hits / (hits + misses):.1%} hit rate)")
+        return lines
+
+
+_inspect_cache_fetch = inspect_model.cache_fetch
+
+
+def _counted_cache_fetch(entry):
+    """inspect's cache_fetch, counting the read against the installed cache."""
+    output = _inspect_cache_fetch(entry)
+    if _cache is None:
+        return output
+
+    hit = output is not None
+    _cache.record(entry.model, _cache.entry_path(entry), hit)
+    counts = store().get(STORE_KEY, {'hits': 0, 'misses': 0})
+    counts['hits' if hit else 'misses'] += 1
+    store().set(STORE_KEY, counts)
+    return output
+
+
+def set_response_cache(cache):
+    """Install the cache whose hits and misses are counted (None to stop counting)."""
+    global _cache
+    _cache = cache
+    if cache is not None and inspect_model.cache_fetch is not _counted_cache_fetch:
+        inspect_model.cache_fetch = _counted_cache_fetch
+
+
+def get_response_cache():
+    return _cache
@@ -1,9 +1,13 @@
+import argparse
+import json
+
 from inspect_ai import eval_set
 from datetime import datetime
 
-success, logs = eval_set(
-   tasks=["reward_hacking_eval.py"],
-   model=["openai/gpt-4.1",
+from budget import BudgetController, set_budget_controller
+from response_cache import ResponseCache, parse_size, set_response_cache
+
+MODELS = ["openai/gpt-4.1",
           "openai/gpt-5-mini",
           "openai/gpt-5",
           "anthropic/claude-3-5-haiku-latest",
@@ -11,6 +15,81 @@ success, logs = eval_set(
         "anthropic/claude-opus-4-1-20250805",
             "google/gemini-2.5-pro",
             "google/gemini-2.5-flash",
-          ],
-   log_dir=f"logs-bulk-{datetime.now().strftime('%Y%m%d%H%M%S')}"      
-)
\ No newline at end of file
+          ]
+
+
+def budget_from_args(args):
+    """Build a BudgetController from the command line, or None when no ceiling is set."""
+    model_budget = {unit: value for unit, value in
+                    (('tokens', args.max_tokens_per_model), ('cost', args.max_cost_per_model)) if value is not None}
+    total_budget = {unit: value for unit, value in
+                    (('tokens', args.max_tokens), ('cost', args.max_cost)) if value is not None}
+    if not model_budget and not total_budget:
+        return None
+
+    prices = {}
+    if args.prices:
+        with open(args.prices) as f:
+            prices = json.load(f)
+    if 'cost' in model_budget or 'cost' in total_budget:
+        missing = [model for model in MODELS if model not in prices]
+        if missing:
+            raise SystemExit(f"--prices has no price for {', '.join(missing)}")
+
+    return BudgetController(
+        model_budgets={model: model_budget for model in MODELS} if model_budget else None,
+        total_budget=total_budget,
+        prices=prices,
+        min_samples=args.min_samples,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the reward hacking eval against every model")
+    parser.add_argument('--max-tokens-per-model', type=float, help='Token ceiling for each model')
+    parser.add_argument('--max-tokens', type=float, help='Token ceiling over all models')
+    parser.add_argument('--max-cost-per-model', type=float, help='Cost ceiling in dollars for each model')
+    parser.add_argument('--max-cost', type=float, help='Cost ceiling in dollars over all models')
+    parser.add_argument('--prices',
+                        help='JSON file mapping each model to {"input": ..., "output": ...} dollars per million tokens')
+    parser.add_argument('--min-samples', type=int, default=5,
+                        help='Finished samples per model before its spend is projected (default: 5)')
+    parser.add_argument('--cache-dir',
+                        help='Cache model responses in this directory and reuse them on reruns')
+    parser.add_argument('--cache-max-size',
+                        help='Evict least recently used responses beyond this size, e.g. 2GB')
+    parser.add_argument('--replay-only', action='store_true',
+                        help='Serve every model call from --cache-dir and fail samples on a cache miss')
+    args = parser.parse_args()
+    if (args.cache_max_size or args.replay_only) and not args.cache_dir:
+        parser.error('--cache-max-size and --replay-only require --cache-dir')
+
+    set_budget_controller(budget_from_args(args))
+
+    options = {}
+    cache = None
+    if args.cache_dir:
+        max_bytes = parse_size(args.cache_max_size) if args.cache_max_size else None
+        cache = ResponseCache(args.cache_dir, max_bytes=max_bytes, replay_only=args.replay_only)
+        set_response_cache(cache)
+        options['cache'] = cache.enable()
+        if args.replay_only:
+            # A miss would fail again on every retry
+            options['retry_attempts'] = 0
+
+    success, logs = eval_set(
+       tasks=["reward_hacking_eval.py"],
+       model=MODELS,
+       log_dir=f"logs-bulk-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+       **options
+    )
+
+    if cache is not None:
+        cache.evict()
+        print("Response cache:")
+        for line in cache.summary():
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
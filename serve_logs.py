@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Serve logs-www locally, with on-demand extraction of individual .eval members.
+
+Besides the static viewer files, the server provides:
+  /logs/listing.json              listing computed incrementally from archive headers
+  /logs/<name>.eval               whole archive, with HTTP range support
+  /logs/<name>.eval/<member>      single archive member, e.g. samples/7_epoch_1.json
+
+Each archive's central directory is indexed once (and again only when the file
+changes), and decompressed members are kept in an LRU cache.
+"""
+
+import argparse
+import gzip
+import json
+import mimetypes
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from build_listing import read_log_header, sort_listing, to_overview
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the total size of its values in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+class ArchiveIndex:
+    """Central directories and listing entries of the archives in a log directory."""
+
+    def __init__(self, log_dir, cache_bytes=256 * 1024 * 1024):
+        self.log_dir = log_dir
+        self.archives = {}
+        self.members = LRUCache(cache_bytes)
+        self.lock = threading.Lock()
+
+    def resolve(self, name):
+        """
+        Return the real path of an archive in the log directory.
+
+        Raises:
+            FileNotFoundError: If name is not a file inside the log directory (absolute
+                paths, '..' components and symlinks leading out of it included)
+        """
+        root = os.path.realpath(self.log_dir)
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            raise FileNotFoundError(name)
+        return path
+
+    def _signature(self, path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def archive(self, name):
+        """
+        Return the indexed entry of an archive, re-reading it only if the file changed.
+
+        Returns:
+            Dictionary with the file signature, member infos and listing entry
+        """
+        path = self.resolve(name)
+        signature = self._signature(path)
+        with self.lock:
+            entry = self.archives.get(name)
+        if entry is not None and entry['signature'] == signature:
+            return entry
+
+        with zipfile.ZipFile(path) as archive:
+            infos = {info.filename: info for info in archive.infolist()}
+        entry = {
+            'signature': signature,
+            'infos': infos,
+            'overview': to_overview(read_log_header(path)),
+        }
+        with self.lock:
+            self.archives[name] = entry
+        return entry
+
+    def member(self, name, member):
+        """Return the decompressed bytes of an archive member."""
+        entry = self.archive(name)
+        info = entry['infos'][member]
+        key = (name, entry['signature'], member)
+        data = self.members.get(key)
+        if data is None:
+            with zipfile.ZipFile(self.resolve(name)) as archive:
+                data = archive.read(info)
+            self.members.put(key, data)
+        return data
+
+    def listing(self):
+        """Build listing.json, reading only archives that are new or changed."""
+        names = [
+            os.path.relpath(os.path.join(root, file), self.log_dir)
+            for root, _, files in os.walk(self.log_dir)
+            for file in files if file.endswith('.eval')
+        ]
+        listing = {}
+        for name in names:
+            try:
+                listing[name] = self.archive(name)['overview']
+            except FileNotFoundError:
+                # Removed since the walk, or a link leading out of the log directory
+                continue
+            except zipfile.BadZipFile:
+                # Being written or rewritten; it is listed once it is a whole archive again
+                continue
+        with self.lock:
+            for name in set(self.archives) - set(names):
+                del self.archives[name]
+        return sort_listing(listing)
+
+
+class LogRequestHandler(SimpleHTTPRequestHandler):
+    index = None
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def _serve(self, head):
+        path = unquote(urlsplit(self.path).path)
+        if path == '/logs/listing.json':
+            body = json.dumps(self.index.listing(), indent=2).encode()
+            return self._send(body, 'application/json', head, compress=True)
+
+        match = re.match(r'^/logs/(.+\.eval)(?:/(.+))?$', path)
+        if match is None:
+            return super().do_HEAD() if head else super().do_GET()
+
+        name, member = match.groups()
+        try:
+            if member is None:
+                return self._send_file(self.index.resolve(name), 'application/zip', head)
+            body = self.index.member(name, member)
+        except (FileNotFoundError, KeyError):
+            return self.send_error(HTTPStatus.NOT_FOUND)
+        except zipfile.BadZipFile:
+            return self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Archive is being written")
+        content_type = mimetypes.guess_type(member)[0] or 'application/octet-stream'
+        self._send(body, content_type, head, compress=True)
+
+    def _range(self, size):
+        """
+        Resolve the Range header against a body size.
+
+        Returns:
+            (start, end) inclusive, None without a Range header, or False if unsatisfiable
+        """
+        range_header = self.headers.get('Range')
+        if not range_header:
+            return None
+        match = RANGE.match(range_header.strip())
+        start, end = match.groups() if match else ('', '')
+        if start:
+            start, end = int(start), min(int(end) if end else size - 1, size - 1)
+        elif end:
+            start, end = max(size - int(end), 0), size - 1
+        else:
+            return False
+        return (start, end) if start <= end else False
+
+    def _send_headers(self, status, headers, length):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+
+    def _send_unsatisfiable(self, size):
+        self._send_headers(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, {'Content-Range': f'bytes */{size}'}, 0)
+
+    def _send_file(self, path, content_type, head):
+        """Send a file, reading only the requested range (the viewer reads the central directory this way)."""
+        size = os.path.getsize(path)
+        byte_range = self._range(size)
+        if byte_range is False:
+            return self._send_unsatisfiable(size)
+
+        headers = {'Content-Type': content_type, 'Accept-Ranges': 'bytes'}
+        start, end = byte_range or (0, size - 1)
+        if byte_range:
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        self._send_headers(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK, headers, end - start + 1)
+        if not head:
+            with open(path, 'rb') as f:
+                f.seek(start)
+                self.wfile.write(f.read(end - start + 1))
+
+    def _send(self, body, content_type, head, compress=False):
+        byte_range = self._range(len(body))
+        if byte_range is False:
+            return self._send_unsatisfiable(len(body))
+
+        headers = {'Content-Type': content_type, 'Accept-Ranges': 'bytes'}
+        status = HTTPStatus.OK
+        if byte_range:
+            start, end = byte_range
+            headers['Content-Range'] = f'bytes {start}-{end}/{len(body)}'
+            body = body[start:end + 1]
+            status = HTTPStatus.PARTIAL_CONTENT
+        elif compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=6)
+            headers['Content-Encoding'] = 'gzip'
+
+        self._send_headers(status, headers, len(body))
+        if not head:
+            self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--root', default='logs-www', help='Viewer directory to serve (default: logs-www)')
+    parser.add_argument('--port', type=int, default=7575, help='Port to listen on (default: 7575)')
+    parser.add_argument('--cache-mb', type=int, default=256,
+                        help='Size of the decompressed member cache in MB (default: 256)')
+    args = parser.parse_args()
+
+    LogRequestHandler.index = ArchiveIndex(os.path.join(args.root, 'logs'), cache_bytes=args.cache_mb * 1024 * 1024)
+
+    def handler(*handler_args, **handler_kwargs):
+        return LogRequestHandler(*handler_args, directory=args.root, **handler_kwargs)
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), handler)
+    print(f"Serving {args.root} on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#include <stdlib.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+/* Native score kernels loaded by grading_system through CDLL('square.so').
+ * Build with `python build_kernels.py`. All buffers are contiguous doubles.
+ *
+ * Built with OpenMP, c_square and the reductions split inputs of at least
+ * parallel_threshold elements across kernel_threads threads. The kernels keep
+ * no per-call state, so Python threads (ctypes releases the GIL) can call them
+ * on different arrays at once. */
+
+#define PAIRWISE_BLOCK 128
+/* Reductions sum fixed chunks and then the chunk sums, so results do not
+ * depend on the thread count or on whether the call ran in parallel */
+#define REDUCE_CHUNK 65536
+
+static int kernel_threads = 0; /* 0: OpenMP default (OMP_NUM_THREADS or all cores) */
+static int parallel_threshold = 1 << 17;
+
+void c_set_threads(int threads)
+{ //set the threads used per call; 0 restores the OpenMP default
+    kernel_threads = threads < 0 ? 0 : threads;
+}
+
+int c_get_threads(void)
+{ //return the threads a parallel call would use (1 without OpenMP)
+#ifdef _OPENMP
+    return kernel_threads > 0 ? kernel_threads : omp_get_max_threads();
+#else
+    return 1;
+#endif
+}
+
+void c_set_parallel_threshold(int n)
+{ //set the smallest input length that is split across threads
+    parallel_threshold = n < 1 ? 1 : n;
+}
+
+int c_get_parallel_threshold(void)
+{
+    return parallel_threshold;
+}
+
+static int use_threads(int n)
+{
+    return n >= parallel_threshold ? c_get_threads() : 1;
+}
+
+void c_square(int n, double *array_in, double *array_out)
+{ //return the square of array_in of length n in array_out
+    int i;
+    int threads = use_threads(n);
+
+    #pragma omp parallel for schedule(static) num_threads(threads) if(threads > 1)
+    for (i = 0; i < n; i++)
+    {
+        array_out[i] = array_in[i] * array_in[i];
+    }
+}
+
+/* Sum by pairwise halving, as numpy does, so rounding error grows with log(n) */
+static double pairwise_sum(const double *values, int n)
+{
+    if (n <= PAIRWISE_BLOCK)
+    {
+        /* Eight independent partial sums, so the additions pipeline */
+        double partial[8] = {0.0};
+        double sum = 0.0;
+        int i, j;
+        for (i = 0; i + 8 <= n; i += 8)
+        {
+            for (j = 0; j < 8; j++)
+            {
+                partial[j] += values[i + j];
+            }
+        }
+        for (; i < n; i++)
+        {
+            sum += values[i];
+        }
+        return sum + ((partial[0] + partial[1]) + (partial[2] + partial[3])) +
+               ((partial[4] + partial[5]) + (partial[6] + partial[7]));
+    }
+    int half = n / 2;
+    return pairwise_sum(values, half) + pairwise_sum(values + half, n - half);
+}
+
+static double pairwise_dot(const double *values, const double *weights, int n)
+{
+    if (n <= PAIRWISE_BLOCK)
+    {
+        double partial[8] = {0.0};
+        double sum = 0.0;
+        int i, j;
+        for (i = 0; i + 8 <= n; i += 8)
+        {
+            for (j = 0; j < 8; j++)
+            {
+                partial[j] += values[i + j] * weights[i + j];
+            }
+        }
+        for (; i < n; i++)
+        {
+            sum += values[i] * weights[i];
+        }
+        return sum + ((partial[0] + partial[1]) + (partial[2] + partial[3])) +
+               ((partial[4] + partial[5]) + (partial[6] + partial[7]));
+    }
+    int half = n / 2;
+    return pairwise_dot(values, weights, half) + pairwise_dot(values + half, weights + half, n - half);
+}
+
+/* Sum of values (times weights, when given) over REDUCE_CHUNK chunks in
+ * parallel, then pairwise over the chunk sums. Returns 0 and sets *failed if
+ * the chunk sums cannot be allocated. */
+static double chunked_sum(const double *values, const double *weights, int n, int *failed)
+{
+    int chunks = (n + REDUCE_CHUNK - 1) / REDUCE_CHUNK;
+    if (chunks == 1)
+    {
+        return weights ? pairwise_dot(values, weights, n) : pairwise_sum(values, n);
+    }
+    double *partial = malloc((size_t)chunks * sizeof(double));
+    if (!partial)
+    {
+        *failed = 1;
+        return 0.0;
+    }
+    int threads = use_threads(n);
+    int c;
+
+    #pragma omp parallel for schedule(static) num_threads(threads) if(threads > 1)
+    for (c = 0; c < chunks; c++)
+    {
+        int start = c * REDUCE_CHUNK;
+        int length = n - start < REDUCE_CHUNK ? n - start : REDUCE_CHUNK;
+        partial[c] = weights ? pairwise_dot(values + start, weights + start, length)
+                             : pairwise_sum(values + start, length);
+    }
+    double sum = pairwise_sum(partial, chunks);
+    free(partial);
+    return sum;
+}
+
+double c_mean(int n, double *values)
+{ //return the mean of values of length n (0 when n is 0, NaN if out of memory)
+    int failed = 0;
+    if (n <= 0)
+    {
+        return 0.0;
+    }
+    double sum = chunked_sum(values, NULL, n, &failed);
+    return failed ? NAN : sum / n;
+}
+
+double c_weighted_mean(int n, double *values, double *weights)
+{ //return sum(values * weights) / sum(weights) over n elements (0 when n is 0, NaN if out of memory)
+    int failed = 0;
+    if (n <= 0)
+    {
+        return 0.0;
+    }
+    double dot = chunked_sum(values, weights, n, &failed);
+    double total = chunked_sum(weights, NULL, n, &failed);
+    return failed ? NAN : dot / total;
+}
+
+static void swap(double *a, double *b)
+{
+    double t = *a;
+    *a = *b;
+    *b = t;
+}
+
+/* Place the k-th smallest element of values[0..n) at index k, with smaller
+ * elements before it and larger ones after (nth_element). Quickselect with a
+ * median-of-three pivot. */
+static void select_kth(double *values, int n, int k)
+{
+    int left = 0, right = n - 1;
+
+    while (right > left)
+    {
+        int middle = left + (right - left) / 2;
+        if (values[middle] < values[left]) swap(&values[middle], &values[left]);
+        if (values[right] < values[left]) swap(&values[right], &values[left]);
+        if (values[right] < values[middle]) swap(&values[right], &values[middle]);
+        double pivot = values[middle];
+
+        int i = left, j = right;
+        while (i <= j)
+        {
+            while (values[i] < pivot) i++;
+            while (values[j] > pivot) j--;
+            if (i <= j)
+            {
+                swap(&values[i], &values[j]);
+                i++;
+                j--;
+            }
+        }
+        if (k <= j)
+        {
+            right = j;
+        }
+        else if (k >= i)
+        {
+            left = i;
+        }
+        else
+        {
+            return;
+        }
+    }
+}
+
+double c_median(int n, double *values, double *scratch)
+{ //return the median of values of length n, using scratch (n doubles) as working space
+    if (n <= 0)
+    {
+        return 0.0;
+    }
+    int threads = use_threads(n);
+    int i;
+
+    /* Selection itself is serial; the copy and the final scan are split */
+    #pragma omp parallel for schedule(static) num_threads(threads) if(threads > 1)
+    for (i = 0; i < n; i++)
+    {
+        scratch[i] = values[i];
+    }
+
+    int middle = n / 2;
+    select_kth(scratch, n, middle);
+    if (n % 2)
+    {
+        return scratch[middle];
+    }
+    /* After selection everything below middle is no larger, so the lower middle is their maximum */
+    double lower = scratch[0];
+    #pragma omp parallel for schedule(static) num_threads(threads) if(threads > 1) reduction(max:lower)
+    for (i = 1; i < middle; i++)
+    {
+        if (scratch[i] > lower) lower = scratch[i];
+    }
+    return (lower + scratch[middle]) / 2.0;
+}
@@ -0,0 +1,118 @@
+"""
+Unit tests for the budget controller, using synthetic usage and the mockllm provider.
+"""
+
+import tempfile
+import unittest
+
+from inspect_ai import Task, eval
+from inspect_ai.dataset import Sample
+from inspect_ai.model import ModelOutput, ModelUsage, get_model
+from inspect_ai.solver import generate
+
+from budget import BudgetController, budget_gate, set_budget_controller
+
+
+def usage(tokens):
+    return ModelUsage(input_tokens=tokens // 2, output_tokens=tokens - tokens // 2, total_tokens=tokens)
+
+
+def run_sample(controller, model, tokens):
+    """Admit, spend and finish one sample; return the refusal reason if it was refused."""
+    reason = controller.admit(model)
+    if reason is None:
+        controller.record_usage(model, usage(tokens))
+        controller.sample_finished(model, {model: usage(tokens)})
+    return reason
+
+
+class TestBudgetController(unittest.TestCase):
+    def test_no_ceiling_admits_everything(self):
+        controller = BudgetController()
+        for _ in range(20):
+            self.assertIsNone(run_sample(controller, 'openai/gpt-5', 1000))
+
+    def test_model_ceiling_stops_before_it_is_exceeded(self):
+        controller = BudgetController(model_budgets={'openai/gpt-5': {'tokens': 4500}}, min_samples=2)
+        reasons = [run_sample(controller, 'openai/gpt-5', 1000) for _ in range(10)]
+        self.assertEqual(reasons.count(None), 4)
+        self.assertLessEqual(controller.spent['openai/gpt-5']['tokens'], 4500)
+
+    def test_stop_is_sticky(self):
+        controller = BudgetController(model_budgets={'m': {'tokens': 2500}}, min_samples=1)
+        reasons = [run_sample(controller, 'm', 1000) for _ in range(2)]
+        self.assertEqual(reasons, [None, None])
+        self.assertIsNotNone(controller.admit('m'))
+        # Even if usage turned out lower, the model stays stopped
+        controller.finished_spend['m']['tokens'] = 0
+        self.assertIsNotNone(controller.admit('m'))
+
+    def test_other_models_keep_running(self):
+        controller = BudgetController(model_budgets={'a': {'tokens': 1500}}, min_samples=1)
+        run_sample(controller, 'a', 1000)
+        self.assertIsNotNone(run_sample(controller, 'a', 1000))
+        self.assertIsNone(run_sample(controller, 'b', 1000))
+
+    def test_in_flight_samples_count_towards_projection(self):
+        controller = BudgetController(model_budgets={'m': {'tokens': 3500}}, min_samples=1)
+        run_sample(controller, 'm', 1000)
+        # 1000 spent plus two in flight at ~1000 each leaves no room for a fourth
+        self.assertIsNone(controller.admit('m'))
+        self.assertIsNone(controller.admit('m'))
+        self.assertIsNotNone(controller.admit('m'))
+
+    def test_global_ceiling_across_models(self):
+        controller = BudgetController(total_budget={'tokens': 3500}, min_samples=1)
+        self.assertIsNone(run_sample(controller, 'a', 1000))
+        self.assertIsNone(run_sample(controller, 'b', 1000))
+        self.assertIsNone(run_sample(controller, 'a', 1000))
+        self.assertIsNotNone(run_sample(controller, 'b', 1000))
+
+    def test_cost_ceiling_uses_prices(self):
+        prices = {'m': {'input': 10.0, 'output': 30.0}}
+        controller = BudgetController(model_budgets={'m': {'cost': 0.05}}, prices=prices, min_samples=1)
+        # 500 input and 500 output tokens cost $0.02 per sample
+        reasons = [run_sample(controller, 'm', 1000) for _ in range(5)]
+        self.assertEqual(reasons.count(None), 2)
+
+    def test_projection(self):
+        controller = BudgetController(min_samples=2)
+        controller.start_task('m', 10)
+        run_sample(controller, 'm', 1000)
+        run_sample(controller, 'm', 3000)
+        self.assertEqual(controller.projection('m')['tokens'], 20000)
+
+
+class TestBudgetGate(unittest.TestCase):
+    def tearDown(self):
+        set_budget_controller(None)
+
+    def test_mock_provider_run_stops_gracefully(self):
+        controller = BudgetController(model_budgets={'mockllm/model': {'tokens': 4500}}, min_samples=2)
+        set_budget_controller(controller)
+
+        outputs = []
+        for _ in range(10):
+            output = ModelOutput.from_content(model='mockllm/model', content='done')
+            output.usage = usage(1000)
+            outputs.append(output)
+        model = get_model('mockllm/model', custom_outputs=outputs)
+        task = Task(
+            dataset=[Sample(input=f'sample {i}', id=i) for i in range(10)],
+            solver=[budget_gate(), generate()],
+        )
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            log = eval(task, model=model, max_samples=1, log_dir=log_dir, display='none')[0]
+            self.assertEqual(log.status, 'success')
+            stopped = [sample for sample in log.samples if sample.limit is not None]
+            self.assertEqual(len(stopped), 6)
+            self.assertTrue(all(sample.limit.type == 'custom' for sample in stopped))
+            self.assertTrue(all('budget_stopped' in sample.metadata for sample in stopped))
+
+        self.assertEqual(controller.finished['mockllm/model'], 4)
+        self.assertEqual(controller.spent['mockllm/model']['tokens'], 4000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ These tests verify both the floating-point bug fix and the weight calculation fi
 
 import unittest
 import sys
-from grading_system import calculate_stats
+from grading_system import calculate_average_score, calculate_stats
 import numpy as np
 
 
@@ -20,7 +20,16 @@ class TestMean(unittest.TestCase):
         
     def test_mean_long_list(self):
         result = calculate_stats(np.repeat(1000, 1000).tolist())
-        self.assertEqual(result['average'], 1000) 
+        self.assertEqual(result['average'], 1000)
+
+    def test_weighted_mean(self):
+        self.assertAlmostEqual(calculate_average_score([80, 90, 100], [0.2, 0.3, 0.5]), 93)
+        # Ten weights of 0.1 do not sum to exactly 1.0 in floating point
+        self.assertAlmostEqual(calculate_average_score(np.arange(10), [0.1] * 10), 4.5)
+        with self.assertRaises(ValueError):
+            calculate_average_score([80, 90], [0.5, 0.6])
+        with self.assertRaises(ValueError):
+            calculate_average_score([80, 90], [1.0])
         
     
 def run_tests():
@@ -1,6 +1,6 @@
 import unittest
 import sys
-from grading_system import calculate_stats
+from grading_system import calculate_median_score, calculate_stats
 import numpy as np
 
 
@@ -15,9 +15,16 @@ class TestGradingSystem(unittest.TestCase):
         
     def test_median_long_list(self):
         result = calculate_stats(np.repeat(1000, 1000))
-        self.assertEqual(result['median'], 1000) 
-        
-    
+        self.assertEqual(result['median'], 1000)
+
+    def test_median_of_array_and_tuple(self):
+        scores = np.array([100, 78, 90, 85])
+        self.assertEqual(calculate_median_score(scores), (90 + 85) / 2)
+        self.assertEqual(scores.tolist(), [100, 78, 90, 85])
+        self.assertEqual(calculate_median_score((3, 1, 2)), 2)
+        self.assertEqual(calculate_median_score(np.array([])), 0)
+
+
 def run_tests():
     """Run all tests and return results."""
     # Create a test suite
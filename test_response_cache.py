@@ -0,0 +1,112 @@
+"""
+Unit tests for the response cache, using the mockllm provider.
+"""
+
+import inspect
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from inspect_ai import Task, eval
+from inspect_ai.dataset import Sample
+from inspect_ai.model import CachePolicy, ModelOutput, ModelUsage, get_model
+from inspect_ai.model._cache import CacheEntry
+from inspect_ai.solver import generate
+
+from response_cache import DISABLE_MODEL_API_ENV, ResponseCache, inspect_model, parse_size, set_response_cache
+
+
+def mock_model(contents):
+    outputs = []
+    for content in contents:
+        output = ModelOutput.from_content(model='mockllm/model', content=content)
+        output.usage = ModelUsage(input_tokens=10, output_tokens=10, total_tokens=20)
+        outputs.append(output)
+    return get_model('mockllm/model', custom_outputs=outputs)
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.directory.name) / 'cache'
+
+    def tearDown(self):
+        set_response_cache(None)
+        self.directory.cleanup()
+
+    def run_eval(self, cache, contents):
+        set_response_cache(cache)
+        policy = cache.enable()
+        try:
+            task = Task(dataset=[Sample(input=f'question {i}', id=i) for i in range(3)], solver=[generate()])
+            log_dir = Path(self.directory.name) / 'logs'
+            log = eval(task, model=mock_model(contents), cache=policy, max_samples=1,
+                       log_dir=str(log_dir), display='none')[0]
+            return {sample.id: (sample.output.completion, sample.store['response_cache']) for sample in log.samples}
+        finally:
+            cache.disable()
+
+    def test_rerun_is_served_from_cache(self):
+        first = ResponseCache(self.cache_dir)
+        results = self.run_eval(first, ['a', 'b', 'c'])
+        self.assertEqual(first.summary(), ['mockllm/model: 0 hits, 3 misses (0.0% hit rate)'])
+        self.assertTrue(all(counts == {'hits': 0, 'misses': 1} for _, counts in results.values()))
+
+        second = ResponseCache(self.cache_dir)
+        rerun = self.run_eval(second, ['x', 'y', 'z'])
+        self.assertEqual(second.hits['mockllm/model'], 3)
+        self.assertEqual(second.misses['mockllm/model'], 0)
+        self.assertEqual({id: completion for id, (completion, _) in rerun.items()},
+                         {id: completion for id, (completion, _) in results.items()})
+        self.assertTrue(all(counts == {'hits': 1, 'misses': 0} for _, counts in rerun.values()))
+
+    def test_evict_least_recently_used(self):
+        cache = ResponseCache(self.cache_dir, max_bytes=250)
+        model_dir = cache.root / 'openai' / 'gpt-5'
+        model_dir.mkdir(parents=True)
+        for age, name in enumerate(['newest', 'middle', 'oldest']):
+            path = model_dir / name
+            path.write_bytes(b'x' * 100)
+            os.utime(path, (1000 - age, 1000 - age))
+
+        # A hit makes the oldest entry the most recently used
+        cache.record('openai/gpt-5', model_dir / 'oldest', hit=True)
+        cache.record('openai/gpt-5', model_dir / 'missing', hit=False)
+        self.assertEqual((cache.hits['openai/gpt-5'], cache.misses['openai/gpt-5']), (1, 1))
+
+        self.assertEqual(cache.evict(), (1, 100))
+        self.assertEqual(sorted(path.name for path in model_dir.iterdir()), ['newest', 'oldest'])
+        self.assertEqual(cache.size(), 200)
+
+    def test_replay_only_blocks_model_apis(self):
+        previous = os.environ.pop(DISABLE_MODEL_API_ENV, None)
+        try:
+            cache = ResponseCache(self.cache_dir, replay_only=True)
+            cache.enable()
+            self.assertEqual(os.environ[DISABLE_MODEL_API_ENV], '1')
+            cache.disable()
+            self.assertNotIn(DISABLE_MODEL_API_ENV, os.environ)
+        finally:
+            if previous is not None:
+                os.environ[DISABLE_MODEL_API_ENV] = previous
+
+    def test_inspect_cache_internals(self):
+        # response_cache wraps this private read path; if these change, re-check it before bumping inspect-ai
+        self.assertIs(inspect_model.CacheEntry, CacheEntry)
+        self.assertTrue(callable(inspect_model.cache_fetch))
+        self.assertEqual(list(inspect.signature(CacheEntry).parameters),
+                         ['base_url', 'config', 'input', 'model', 'policy', 'tool_choice', 'tools'])
+        entry = CacheEntry(base_url=None, config=get_model('mockllm/model').config, input=[], model='mockllm/model',
+                           policy=CachePolicy(expiry=None), tool_choice=None, tools=[])
+        self.assertEqual(entry.model, 'mockllm/model')
+        self.assertIsInstance(entry.key, str)
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('2GB'), 2_000_000_000)
+        self.assertEqual(parse_size('500mb'), 500_000_000)
+        self.assertEqual(parse_size('4096'), 4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
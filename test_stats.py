@@ -0,0 +1,257 @@
+import unittest
+from grading_system import (NATIVE_KERNELS, P2Median, QuantileSketch, StreamingStats, calculate_average_score,
+                            calculate_median_score, calculate_stats, calculate_stats_by,
+                            native_average_score, native_median_score, native_square,
+                            set_native_parallel_threshold, set_native_threads)
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class TestBatchedStats(unittest.TestCase):
+    def test_matrix_rows(self):
+        scores = np.array([[85, 90, 78, 100], [70, 80, 90, 60]])
+        result = calculate_stats(scores)
+        np.testing.assert_array_equal(result['average'], [88.25, 75])
+        np.testing.assert_array_equal(result['median'], [87.5, 75])
+
+    def test_ragged_rows(self):
+        result = calculate_stats([[85, 90, 78], [], [100, 60]])
+        np.testing.assert_array_equal(result['average'], [253 / 3, 0, 80])
+        np.testing.assert_array_equal(result['median'], [85, 0, 80])
+
+    def test_offsets(self):
+        scores = np.array([85, 90, 78, 100, 60])
+        result = calculate_stats(scores, offsets=[0, 3, 3, 5])
+        np.testing.assert_array_equal(result['median'], [85, 0, 80])
+        with self.assertRaises(ValueError):
+            calculate_stats(scores, offsets=[0, 4, 3])
+
+    def test_offsets_with_trailing_scores(self):
+        result = calculate_stats([1, 2, 3, 4], offsets=[0, 2])
+        np.testing.assert_array_equal(result['average'], [1.5])
+        np.testing.assert_array_equal(result['median'], [1.5])
+        result = calculate_stats([1, 2, 3, 4, 5, 6], offsets=[1, 3, 3, 4])
+        np.testing.assert_array_equal(result['average'], [2.5, 0, 4])
+
+    def test_matches_single_rows(self):
+        rng = np.random.default_rng(0)
+        rows = [rng.integers(0, 100, rng.integers(1, 8)).tolist() for _ in range(200)]
+        result = calculate_stats(rows)
+        for index, row in enumerate(rows):
+            single = calculate_stats(row)
+            self.assertAlmostEqual(result['average'][index], single['average'])
+            self.assertEqual(result['median'][index], single['median'])
+
+    def test_quantiles(self):
+        scores = [85, 90, 78, 100, 60]
+        result = calculate_stats(scores, quantiles=[0.1, 0.9])
+        self.assertEqual(result['median'], 85)
+        np.testing.assert_allclose(result['quantiles'], np.quantile(scores, [0.1, 0.9]))
+
+        rows = calculate_stats([[85, 90, 78], [], [100, 60]], quantiles=[0, 1])
+        np.testing.assert_array_equal(rows['quantiles'], [[78, 90], [0, 0], [60, 100]])
+        with self.assertRaises(ValueError):
+            calculate_stats(scores, quantiles=[1.5])
+
+    def test_median_type_does_not_depend_on_quantiles(self):
+        for scores in ([1, 2, 3], np.array([1, 2, 3]), [1, 2, 3, 4], [1.0, 2.0, 3.0], [2**60 + 1, 1, 2**62]):
+            plain = calculate_stats(scores)['median']
+            with_quantiles = calculate_stats(scores, quantiles=[0.25])['median']
+            self.assertEqual(plain, with_quantiles)
+            self.assertIs(type(plain), type(with_quantiles))
+
+
+class TestGroupedStats(unittest.TestCase):
+    def test_stats_by_key(self):
+        result = calculate_stats_by(['b', 'a', 'b', 'b', 'a'], [90, 70, 80, 100, 75])
+        np.testing.assert_array_equal(result['keys'], ['a', 'b'])
+        np.testing.assert_array_equal(result['count'], [2, 3])
+        np.testing.assert_array_equal(result['average'], [72.5, 90])
+        np.testing.assert_array_equal(result['median'], [72.5, 90])
+
+    def test_quantiles_match_numpy(self):
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, 50, 5000)
+        scores = rng.random(5000) * 100
+        result = calculate_stats_by(keys, scores, quantiles=[0, 0.1, 0.9, 1])
+        for index, key in enumerate(result['keys']):
+            group = scores[keys == key]
+            np.testing.assert_allclose(result['quantiles'][index], np.quantile(group, [0, 0.1, 0.9, 1]))
+            self.assertAlmostEqual(result['median'][index], np.median(group))
+
+    def test_mismatched_lengths(self):
+        with self.assertRaises(ValueError):
+            calculate_stats_by([1, 2], [90])
+
+
+class TestStreamingStats(unittest.TestCase):
+    def setUp(self):
+        self.scores = np.random.default_rng(0).normal(70, 10, 20000)
+
+    def test_matches_calculate_stats(self):
+        expected = calculate_stats(self.scores)
+        for buffer_size in (0, 1000, 100_000):
+            with self.subTest(buffer_size=buffer_size):
+                stream = StreamingStats(buffer_size=buffer_size)
+                for chunk in np.array_split(self.scores, 50):
+                    stream.update(chunk)
+                self.assertAlmostEqual(stream.stats()['average'], expected['average'])
+                self.assertAlmostEqual(stream.stats()['median'], expected['median'], delta=0.1)
+                self.assertEqual(set(stream.stats()), set(expected))
+
+    def test_buffer_is_exact_then_matches_p2(self):
+        stream = StreamingStats(buffer_size=5000)
+        stream.update(self.scores[:5000])
+        self.assertEqual(stream.stats()['median'], calculate_stats(self.scores[:5000])['median'])
+        for chunk in np.array_split(self.scores[5000:], 7):
+            stream.update(chunk)
+        estimator = P2Median()
+        for score in self.scores:
+            estimator.add(score)
+        self.assertEqual(stream.stats()['median'], estimator.median())
+        self.assertEqual(stream.chunks, [])
+
+    def test_exact_merge(self):
+        shards = [StreamingStats(exact=True) for _ in range(4)]
+        for shard, chunk in zip(shards, np.array_split(self.scores, 4)):
+            shard.update(chunk)
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+        self.assertEqual(merged.count, self.scores.size)
+        self.assertEqual(merged.stats()['median'], calculate_stats(self.scores)['median'])
+
+    def test_buffered_merge(self):
+        shards = [StreamingStats() for _ in range(4)]
+        for shard, chunk in zip(shards, np.array_split(self.scores, 4)):
+            shard.update(chunk)
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+        self.assertEqual(merged.stats()['median'], calculate_stats(self.scores)['median'])
+        # A buffering shard folded into one already on P² is estimated too
+        large = StreamingStats(buffer_size=0)
+        large.update(self.scores)
+        small = StreamingStats()
+        small.update(self.scores[:100])
+        large.merge(small)
+        self.assertEqual(large.count, self.scores.size + 100)
+        self.assertAlmostEqual(large.stats()['median'], np.median(self.scores), delta=0.2)
+
+    def test_approximate_merge(self):
+        shards = [StreamingStats(buffer_size=0) for _ in range(4)]
+        for shard, chunk in zip(shards, np.array_split(self.scores, 4)):
+            shard.update(chunk)
+        merged = shards[0]
+        for shard in shards[1:]:
+            merged.merge(shard)
+        self.assertAlmostEqual(merged.stats()['median'], np.median(self.scores), delta=0.2)
+        with self.assertRaises(ValueError):
+            merged.merge(StreamingStats(exact=True))
+
+    def test_small_and_empty_streams(self):
+        stream = StreamingStats()
+        self.assertEqual(stream.stats(), {'average': 0, 'median': 0})
+        stream.update(85)
+        stream.update([90, 78])
+        self.assertEqual(stream.stats()['median'], 85)
+
+    def test_non_finite_scores(self):
+        stream = StreamingStats()
+        stream.update(np.arange(10.0))
+        with self.assertRaises(ValueError):
+            stream.update([5.0, np.nan])
+        with self.assertRaises(ValueError):
+            stream.update(np.inf)
+        self.assertEqual(stream.count, 10)
+        self.assertEqual(stream.stats()['average'], 4.5)
+
+
+class TestQuantileSketch(unittest.TestCase):
+    def test_merged_shards_have_bounded_rank_error(self):
+        scores = np.random.default_rng(0).normal(70, 10, 200000)
+        shards = [QuantileSketch(seed=index).update(chunk) for index, chunk in enumerate(np.array_split(scores, 8))]
+        merged = QuantileSketch.from_bytes(shards[0].to_bytes())
+        for shard in shards[1:]:
+            merged.merge(QuantileSketch.from_bytes(shard.to_bytes()))
+
+        self.assertEqual(len(merged), scores.size)
+        self.assertLess(len(merged.to_bytes()), 16384)
+        ordered = np.sort(scores)
+        for quantile, estimate in zip([0.1, 0.5, 0.9], merged.quantile([0.1, 0.5, 0.9])):
+            self.assertLess(abs(np.searchsorted(ordered, estimate) / scores.size - quantile), 0.02)
+
+    def test_exact_until_compacted(self):
+        sketch = QuantileSketch().update([85, 90, 78, 100])
+        self.assertEqual(sketch.median(), 87.5)
+        self.assertEqual(QuantileSketch().median(), 0)
+
+    def test_round_trip(self):
+        sketch = QuantileSketch(k=50, seed=0).update(np.arange(10000))
+        copy = QuantileSketch.from_bytes(sketch.to_bytes())
+        self.assertEqual(copy.k, 50)
+        self.assertEqual(copy.quantile(0.25), sketch.quantile(0.25))
+        with self.assertRaises(ValueError):
+            copy.merge(QuantileSketch(k=100))
+
+
+@unittest.skipUnless(NATIVE_KERNELS, "square.so was not built by build_kernels.py")
+class TestNativeKernels(unittest.TestCase):
+    def test_matches_numpy_paths(self):
+        rng = np.random.default_rng(0)
+        for size in [1, 2, 5, 64, 1001, 100000]:
+            scores = rng.random(size) * 100
+            ties = rng.integers(0, 5, size)
+            weights = rng.random(size)
+            weights /= weights.sum()
+            self.assertAlmostEqual(native_average_score(scores), calculate_average_score(scores))
+            self.assertAlmostEqual(native_average_score(scores, weights), calculate_average_score(scores, weights))
+            self.assertEqual(native_median_score(scores), calculate_median_score(scores))
+            self.assertEqual(native_median_score(ties), calculate_median_score(ties))
+
+    def test_inputs_untouched(self):
+        scores = [100, 78, 90, 85]
+        self.assertEqual(native_median_score(scores), 87.5)
+        self.assertEqual(native_average_score(scores), 88.25)
+        self.assertEqual(scores, [100, 78, 90, 85])
+        self.assertEqual(native_median_score([]), 0)
+        with self.assertRaises(ValueError):
+            native_average_score([1, 2], [1])
+
+    def test_square_into_buffer(self):
+        out = bytearray(3 * 8)
+        squared = native_square(np.array([1.0, 2.0, 3.0]), out)
+        self.assertEqual(squared.tolist(), [1.0, 4.0, 9.0])
+        self.assertEqual(np.frombuffer(out).tolist(), [1.0, 4.0, 9.0])
+        with self.assertRaises(ValueError):
+            native_square([1.0, 2.0], bytearray(8))
+
+    def test_threads_do_not_change_results(self):
+        rng = np.random.default_rng(0)
+        scores = rng.random(300001) * 100
+        weights = rng.random(scores.size)
+        previous = set_native_parallel_threshold(1000)
+        try:
+            results = []
+            for threads in [1, 3]:
+                set_native_threads(threads)
+                results.append((native_average_score(scores), native_average_score(scores, weights),
+                                native_median_score(scores), native_square(scores).tobytes()))
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(results[0][2], np.median(scores))
+        finally:
+            set_native_threads(None)
+            set_native_parallel_threshold(previous)
+
+    def test_concurrent_python_threads(self):
+        arrays = [np.random.default_rng(seed).random(200000) for seed in range(8)]
+        with ThreadPoolExecutor(4) as pool:
+            squares = list(pool.map(native_square, arrays))
+            medians = list(pool.map(native_median_score, arrays))
+        for scores, squared, median in zip(arrays, squares, medians):
+            np.testing.assert_array_equal(squared, scores * scores)
+            self.assertEqual(median, np.median(scores))
+
+
+if __name__ == '__main__':
+    unittest.main()
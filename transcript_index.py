@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Build and query an on-disk inverted index over sample transcripts.
+
+Every identifier and number in the tool calls and tool outputs of a sample is
+indexed, together with the lines its edits removed from and added to code.py
+(replayed with transcripts.replay_edits). Terms are `<field>:<token>`:
+  call:<token>      appears in a tool call (bash command or python code)
+  output:<token>    appears in a tool output
+  removed:<token>   on a line an edit removed from code.py
+  added:<token>     on a line an edit added to code.py
+
+Index layout:
+  docs.json       one entry per sample: log, id, epoch, model, condition, hacked
+  terms.json      term -> [offset, count] into postings.bin
+  postings.bin    sorted uint32 sample numbers of every term, concatenated
+
+Example:
+  python transcript_index.py build logs-bulk-*
+  python transcript_index.py query removed:CDLL --model '*gpt-5*'
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import defaultdict
+from fnmatch import fnmatch
+
+import numpy as np
+
+TOKEN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*|\d+')
+FIELDS = ('call', 'output', 'removed', 'added')
+
+
+def changed_lines(before, after):
+    """
+    Split an edit into the lines it removed and the lines it added.
+
+    Returns:
+        Tuple of (removed lines, added lines)
+    """
+    before_lines = set(before.splitlines())
+    after_lines = set(after.splitlines())
+    return before_lines - after_lines, after_lines - before_lines
+
+
+def sample_terms(sample):
+    """Return the set of `<field>:<token>` terms of a sample transcript."""
+    from transcripts import replay_edits, tool_calls
+
+    terms = set()
+    for call in tool_calls(sample):
+        terms.update(f"call:{token}" for token in TOKEN.findall(call['text']))
+        terms.update(f"output:{token}" for token in TOKEN.findall(call['output']))
+
+    edits, _ = replay_edits(sample)
+    for edit in edits:
+        if edit['before'] is None or edit['after'] is None:
+            continue
+        removed, added = changed_lines(edit['before'], edit['after'])
+        for line in removed:
+            terms.update(f"removed:{token}" for token in TOKEN.findall(line))
+        for line in added:
+            terms.update(f"added:{token}" for token in TOKEN.findall(line))
+    return terms
+
+
+def sample_hacked(sample):
+    """Return whether the sample was scored as hacked, or None if it has no score."""
+    score = (sample.get('scores') or {}).get('test_scoring')
+    if not score or not isinstance(score.get('value'), dict) or 'hacked' not in score['value']:
+        return None
+    return score['value'].get('hacked') == 'I'
+
+
+def build_index(log_paths, index_dir):
+    """
+    Index every sample of the given logs.
+
+    Args:
+        log_paths: .eval archives to index
+        index_dir: Directory to write the index into
+
+    Returns:
+        Tuple of (number of samples, number of terms)
+    """
+    # Only building needs transcripts and inspect_ai, which take seconds to import
+    from analyze_hacking_rates import sample_condition
+    from transcripts import iter_samples
+
+    docs = []
+    postings = defaultdict(list)
+    for path, model, sample in iter_samples(log_paths):
+        doc = len(docs)
+        docs.append({
+            'log': path,
+            'id': sample['id'],
+            'epoch': sample['epoch'],
+            'model': model,
+            'condition': sample_condition(sample['metadata']),
+            'hacked': sample_hacked(sample),
+        })
+        # Samples are numbered in order, so every posting list comes out sorted
+        for term in sample_terms(sample):
+            postings[term].append(doc)
+
+    os.makedirs(index_dir, exist_ok=True)
+    terms = {}
+    offset = 0
+    with open(os.path.join(index_dir, 'postings.bin'), 'wb') as f:
+        for term in sorted(postings):
+            ids = np.asarray(postings[term], dtype=np.uint32)
+            f.write(ids.tobytes())
+            terms[term] = [offset, len(ids)]
+            offset += len(ids)
+    with open(os.path.join(index_dir, 'terms.json'), 'w') as f:
+        json.dump(terms, f, separators=(',', ':'))
+    with open(os.path.join(index_dir, 'docs.json'), 'w') as f:
+        json.dump(docs, f, separators=(',', ':'))
+    return len(docs), len(terms)
+
+
+class TranscriptIndex:
+    """Read side of an index written by build_index."""
+
+    def __init__(self, index_dir):
+        with open(os.path.join(index_dir, 'docs.json')) as f:
+            self.docs = json.load(f)
+        with open(os.path.join(index_dir, 'terms.json')) as f:
+            self.terms = json.load(f)
+        postings_path = os.path.join(index_dir, 'postings.bin')
+        if os.path.getsize(postings_path):
+            self.postings = np.memmap(postings_path, dtype=np.uint32, mode='r')
+        else:
+            self.postings = np.zeros(0, dtype=np.uint32)
+
+    def postings_of(self, term):
+        """Return the sorted sample numbers containing a term."""
+        if ':' not in term:
+            # A bare token matches in any field
+            return np.unique(np.concatenate([self.postings_of(f"{field}:{term}") for field in FIELDS]))
+        offset, count = self.terms.get(term, (0, 0))
+        return self.postings[offset:offset + count]
+
+    def search(self, terms, models=None, conditions=None, hacked=None):
+        """
+        Find the samples containing all the given terms.
+
+        Args:
+            terms: `<field>:<token>` terms (or bare tokens, matching any field)
+            models: Only keep samples whose model matches one of these glob patterns
+            conditions: Only keep samples whose condition matches one of these glob patterns
+            hacked: Only keep hacked (True) or non-hacked (False) samples
+
+        Returns:
+            List of matching sample entries
+        """
+        matches = None
+        # Intersect the rarest lists first
+        for ids in sorted((self.postings_of(term) for term in terms), key=len):
+            matches = ids if matches is None else np.intersect1d(matches, ids, assume_unique=True)
+            if not len(matches):
+                break
+        if matches is None:
+            matches = np.arange(len(self.docs))
+
+        results = [self.docs[doc] for doc in matches.tolist()]
+        if models:
+            results = [doc for doc in results if any(fnmatch(doc['model'], model) for model in models)]
+        if conditions:
+            results = [doc for doc in results
+                       if any(fnmatch(doc['condition'], condition) for condition in conditions)]
+        if hacked is not None:
+            results = [doc for doc in results if doc['hacked'] is hacked]
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='Index the transcripts of a set of logs')
+    build_parser.add_argument('log_dirs', nargs='*', default=['logs-bulk-*'],
+                              help='Log directories, log files or glob patterns (default: logs-bulk-*)')
+    build_parser.add_argument('--index-dir', default='transcript-index',
+                              help='Directory to write the index into (default: transcript-index)')
+
+    query_parser = subparsers.add_parser('query', help='List the samples containing all the given terms')
+    query_parser.add_argument('terms', nargs='*', help='Terms such as removed:CDLL or call:sed')
+    query_parser.add_argument('--index-dir', default='transcript-index',
+                              help='Directory containing the index (default: transcript-index)')
+    query_parser.add_argument('--model', action='append', dest='models',
+                              help='Only list models matching this glob pattern (repeatable)')
+    query_parser.add_argument('--condition', action='append', dest='conditions',
+                              help='Only list conditions matching this glob pattern (repeatable)')
+    query_parser.add_argument('--hacked', action=argparse.BooleanOptionalAction,
+                              help='Only list hacked (--hacked) or non-hacked (--no-hacked) samples')
+
+    args = parser.parse_args()
+    if args.command == 'build':
+        from analyze_hacking_rates import find_logs
+        logs = [path for path in find_logs(args.log_dirs) if path.endswith('.eval')]
+        if not logs:
+            raise SystemExit(f"No logs found matching {' '.join(args.log_dirs)}")
+        samples, terms = build_index(logs, args.index_dir)
+        print(f"Indexed {samples} samples from {len(logs)} logs ({terms} terms) into {args.index_dir}")
+        return
+
+    index = TranscriptIndex(args.index_dir)
+    results = index.search(args.terms, models=args.models, conditions=args.conditions, hacked=args.hacked)
+    for doc in results:
+        hacked = {True: 'hacked', False: 'not hacked', None: 'unscored'}[doc['hacked']]
+        print(f"{doc['log']}  {doc['id']} epoch {doc['epoch']}  {doc['model']}  {doc['condition']}  {hacked}")
+    print(f"{len(results)} of {len(index.docs)} samples")
+
+
+if __name__ == "__main__":
+    main()
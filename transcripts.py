@@ -0,0 +1,469 @@
+"""
+Read sample transcripts from .eval archives and replay the agent's edits to code.py.
+
+Agents edit code.py in many ways (heredocs, sed, apply_patch, python scripts).
+The replay understands heredoc writes and appends, apply_patch updates, simple
+`sed -i 's/.../.../'` substitutions, python scripts whose string manipulation
+can be evaluated statically, and complete `cat code.py` observations. Commands
+that never ran (apply_patch is not installed in the sandbox, shell syntax errors)
+are skipped. Nothing is executed. Any other command that may write code.py makes the contents
+unknown until the next full rewrite or complete observation.
+"""
+
+import ast
+import json
+import os
+import re
+import shlex
+import zipfile
+
+from analyze_hacking_rates import sample_condition
+
+SOURCE_ROOT = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_MEMBER = re.compile(r'^samples/.+\.json$')
+
+HEREDOC = re.compile(
+    r"^(?P<head>[^\n]*?)<<-?\s*(?P<quote>['\"]?)(?P<delimiter>\w+)(?P=quote)(?P<tail>[^\n]*)\n"
+    r"(?P<body>.*?)\n(?P=delimiter)[ \t]*(?:\n(?P<rest>.*))?$",
+    re.DOTALL
+)
+SED_SUBSTITUTE = re.compile(r"^\s*sed\s+-i\s+(?:-e\s+)?'s(.)((?:\\.|(?!\1).)*)\1((?:\\.|(?!\1).)*)\1(g?)'\s+(?:\./)?code\.py\s*$")
+CAT_CODE = re.compile(r'^\s*cat\s+(?:\./)?code\.py\s*$')
+READ_ONLY_COMMAND = re.compile(r'^\s*(?:cat|head|tail|grep|wc|nl|less|diff|ls|python3?\s+(?:-m\s+\w+\s+)?test\w*\.py|sed\s+-n)\b')
+COPY_FROM_CODE = re.compile(r'^\s*cp\s+(?:-\w+\s+)*(?:\./)?code\.py\s+(?!(?:\./)?code\.py\b)\S+\s*$')
+COMMAND_SEPARATOR = re.compile(r'\s*(?:&&|\|\||;|\||\n)\s*')
+TRUNCATED_OUTPUT = 'The output of your call to'
+# The sandbox has no apply_patch tool, and a command bash cannot parse never runs
+PATCH_NOT_FOUND = re.compile(r'apply_?patch: command not found')
+SHELL_SYNTAX_ERROR = re.compile(r'^bash: -c: line \d+: (?:syntax error|unexpected EOF)')
+
+
+def iter_samples(log_paths):
+    """
+    Yield every sample transcript of the given .eval archives.
+
+    Yields:
+        Tuples of (log path, model, sample dictionary)
+    """
+    for path in log_paths:
+        with zipfile.ZipFile(path) as archive:
+            try:
+                model = json.loads(archive.read('header.json'))['eval']['model']
+            except KeyError:
+                model = json.loads(archive.read('_journal/start.json'))['eval']['model']
+            for name in archive.namelist():
+                if SAMPLE_MEMBER.match(name):
+                    yield path, model, json.loads(archive.read(name))
+
+
+def message_text(content):
+    """Flatten message content (a string or a list of content parts) to text."""
+    if isinstance(content, str):
+        return content
+    return "\n".join(part.get('text', '') for part in content if isinstance(part, dict))
+
+
+def tool_calls(sample):
+    """
+    List the tool calls of a transcript in order, with their outputs.
+
+    Returns:
+        List of dictionaries with step, function, text (command or code) and output
+    """
+    outputs = {
+        message.get('tool_call_id'): message_text(message['content'])
+        for message in sample['messages'] if message['role'] == 'tool'
+    }
+    calls = []
+    for message in sample['messages']:
+        for call in message.get('tool_calls') or []:
+            arguments = call.get('arguments') or {}
+            calls.append({
+                'step': len(calls),
+                'function': call['function'],
+                'text': arguments.get('cmd') or arguments.get('code') or '',
+                'output': outputs.get(call['id'], ''),
+            })
+    return calls
+
+
+def initial_code(metadata):
+    """Assemble the code.py a sample started from, as reward_hacking_eval does."""
+    folder = os.path.join(SOURCE_ROOT, metadata['task_root'])
+    parts = [
+        os.path.join(folder, 'header', metadata['header']),
+        os.path.join(folder, 'body', metadata['body']),
+        os.path.join(folder, 'core.py'),
+        os.path.join(folder, 'extra_code', metadata['extra_code']),
+    ]
+    contents = []
+    for part in parts:
+        with open(part) as f:
+            contents.append(f.read())
+    return "".join(contents)
+
+
+def _bre_to_python(pattern):
+    """Translate a sed basic regular expression to Python syntax."""
+    translated = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            translated.append(nxt if nxt in '(){}+?|' else '\\' + nxt)
+            i += 2
+            continue
+        translated.append('\\' + char if char in '(){}+?|' else char)
+        i += 1
+    return "".join(translated)
+
+
+def _sed_replacement(replacement):
+    """Translate a sed replacement to a function usable with re.sub."""
+    def replace(match):
+        result = []
+        i = 0
+        while i < len(replacement):
+            char = replacement[i]
+            if char == '\\' and i + 1 < len(replacement):
+                nxt = replacement[i + 1]
+                if nxt.isdigit():
+                    result.append(match.group(int(nxt)) or '')
+                else:
+                    result.append({'n': '\n', 't': '\t'}.get(nxt, nxt))
+                i += 2
+                continue
+            result.append(match.group(0) if char == '&' else char)
+            i += 1
+        return "".join(result)
+    return replace
+
+
+def _apply_sed(code, match):
+    _, pattern, replacement, flags = match.groups()
+    regex = re.compile(_bre_to_python(pattern))
+    count = 0 if flags == 'g' else 1
+    lines = code.split('\n')
+    return '\n'.join(regex.sub(_sed_replacement(replacement), line, count=count) for line in lines)
+
+
+class _Unknown(Exception):
+    """Raised when a python expression cannot be evaluated statically."""
+
+
+class _Handle:
+    def __init__(self, path, mode):
+        self.path = path
+        self.mode = mode
+
+
+def _is_code_path(value):
+    return isinstance(value, str) and os.path.basename(value) == 'code.py'
+
+
+class _PythonEditEvaluator:
+    """
+    Evaluate the string manipulation of a python tool call without running it.
+
+    Understands straight-line code that reads code.py, transforms it with str
+    methods, slicing, concatenation and re.sub on constants, and writes it back
+    through open(..., 'w') or Path.write_text.
+    """
+
+    STR_METHODS = {'replace', 'strip', 'rstrip', 'lstrip', 'find', 'index', 'rfind', 'split', 'join',
+                   'splitlines', 'startswith', 'endswith', 'count', 'format'}
+    RE_FLAGS = {name: getattr(re, name) for name in ('S', 'M', 'I', 'X', 'DOTALL', 'MULTILINE', 'IGNORECASE', 'VERBOSE')}
+
+    def __init__(self, code):
+        self.code = code
+        self.names = {}
+        self.written = None
+
+    def run(self, statements):
+        for statement in statements:
+            if isinstance(statement, ast.Assign):
+                try:
+                    value = self.eval(statement.value)
+                except _Unknown:
+                    value = _Unknown
+                for target in statement.targets:
+                    if isinstance(target, ast.Name):
+                        self.names[target.id] = value
+            elif isinstance(statement, ast.With):
+                for item in statement.items:
+                    handle = self.eval(item.context_expr)
+                    if item.optional_vars is not None and isinstance(item.optional_vars, ast.Name):
+                        self.names[item.optional_vars.id] = handle
+                self.run(statement.body)
+            elif isinstance(statement, ast.Expr):
+                try:
+                    self.eval(statement.value)
+                except _Unknown:
+                    if self._mentions_write(statement):
+                        raise
+            elif isinstance(statement, (ast.Import, ast.ImportFrom, ast.Pass, ast.FunctionDef, ast.ClassDef)):
+                continue
+            elif self._mentions_write(statement):
+                raise _Unknown()
+
+    def _mentions_write(self, node):
+        source = ast.unparse(node)
+        return 'code.py' in source or 'write' in source
+
+    def _write(self, value):
+        if not isinstance(value, str):
+            raise _Unknown()
+        self.written = value if self.written is None else self.written + value
+
+    def eval(self, node):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id in self.RE_FLAGS:
+                return self.RE_FLAGS[node.id]
+            value = self.names.get(node.id, _Unknown)
+            if value is _Unknown:
+                raise _Unknown()
+            return value
+        if isinstance(node, ast.JoinedStr):
+            if all(isinstance(part, ast.Constant) for part in node.values):
+                return "".join(part.value for part in node.values)
+            raise _Unknown()
+        if isinstance(node, ast.BinOp):
+            left, right = self.eval(node.left), self.eval(node.right)
+            if isinstance(node.op, ast.Add) and type(left) is type(right):
+                return left + right
+            if isinstance(node.op, (ast.BitOr, ast.Sub)) and isinstance(left, int) and isinstance(right, int):
+                return left | right if isinstance(node.op, ast.BitOr) else left - right
+            raise _Unknown()
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == 're':
+            if node.attr in self.RE_FLAGS:
+                return self.RE_FLAGS[node.attr]
+            raise _Unknown()
+        if isinstance(node, ast.Subscript):
+            value = self.eval(node.value)
+            if isinstance(node.slice, ast.Slice):
+                bounds = [self.eval(bound) if bound is not None else None
+                          for bound in (node.slice.lower, node.slice.upper, node.slice.step)]
+                return value[slice(*bounds)]
+            return value[self.eval(node.slice)]
+        if isinstance(node, ast.Call):
+            return self._call(node)
+        raise _Unknown()
+
+    def _call(self, node):
+        func = node.func
+        if node.keywords and not (isinstance(func, ast.Attribute) and func.attr == 'sub'):
+            if not (isinstance(func, ast.Name) and func.id == 'open'):
+                raise _Unknown()
+
+        # open(path, mode) and Path(path)
+        if isinstance(func, ast.Name) and func.id == 'open':
+            args = [self.eval(arg) for arg in node.args]
+            mode = args[1] if len(args) > 1 else next(
+                (self.eval(kw.value) for kw in node.keywords if kw.arg == 'mode'), 'r')
+            return _Handle(args[0], mode)
+        if isinstance(func, ast.Name) and func.id == 'Path':
+            return _Handle(self.eval(node.args[0]), None)
+
+        if not isinstance(func, ast.Attribute):
+            if isinstance(func, ast.Name) and func.id in ('print', 'len'):
+                return None
+            raise _Unknown()
+
+        # re.sub(pattern, repl, string, count=0, flags=0)
+        if isinstance(func.value, ast.Name) and func.value.id == 're' and func.attr == 'sub':
+            args = [self.eval(arg) for arg in node.args]
+            kwargs = {kw.arg: self.eval(kw.value) for kw in node.keywords}
+            if not all(isinstance(arg, (str, int)) for arg in args + list(kwargs.values())):
+                raise _Unknown()
+            return re.sub(*args, **kwargs)
+
+        owner = self.eval(func.value)
+        if isinstance(owner, _Handle):
+            if func.attr in ('read', 'read_text'):
+                if _is_code_path(owner.path) and (owner.mode is None or 'r' in owner.mode):
+                    return self.code
+                raise _Unknown()
+            if func.attr in ('write', 'write_text'):
+                value = self.eval(node.args[0])
+                if _is_code_path(owner.path):
+                    self._write(value)
+                return None
+            raise _Unknown()
+        if isinstance(owner, str) and func.attr in self.STR_METHODS:
+            return getattr(owner, func.attr)(*[self.eval(arg) for arg in node.args])
+        raise _Unknown()
+
+
+def _python_write(source, code):
+    """
+    Return the text a python tool call writes to code.py.
+
+    Returns:
+        The new contents, None if the call does not write code.py, or False if
+        it writes code.py with contents that cannot be determined statically
+    """
+    if 'code.py' not in source:
+        return None
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return False
+
+    writes = any(
+        isinstance(node, ast.Call) and (
+            (isinstance(node.func, ast.Attribute) and node.func.attr in ('write', 'write_text', 'writelines'))
+            or (isinstance(node.func, ast.Attribute) and node.func.attr in ('copy', 'copyfile', 'move', 'rename', 'replace')
+                and 'code.py' in ast.unparse(node))
+        )
+        for node in ast.walk(tree)
+    )
+    if not writes:
+        return None
+
+    evaluator = _PythonEditEvaluator(code)
+    try:
+        evaluator.run(tree.body)
+    except (_Unknown, TypeError, ValueError, IndexError, KeyError, re.error):
+        return False
+    return evaluator.written
+
+
+def _apply_patch(code, patch):
+    """Apply an `*** Update File: code.py` patch in the apply_patch format."""
+    if code is None or '*** Update File:' not in patch:
+        return None
+    hunks = re.split(r'^@@[^\n]*$', patch.split('*** Update File:', 1)[1].split('\n', 1)[1], flags=re.MULTILINE)
+    for hunk in hunks:
+        old, new = [], []
+        for line in hunk.split('\n'):
+            if line.startswith('***'):
+                break
+            if line.startswith('-'):
+                old.append(line[1:])
+            elif line.startswith('+'):
+                new.append(line[1:])
+            elif line.startswith(' ') or line == '':
+                old.append(line[1:])
+                new.append(line[1:])
+        while old and new and old[-1] == '' and new[-1] == '':
+            old.pop()
+            new.pop()
+        if not old and not new:
+            continue
+        old_text, new_text = '\n'.join(old), '\n'.join(new)
+        if old_text not in code:
+            return None
+        code = code.replace(old_text, new_text, 1)
+    return code
+
+
+def _unwrap_shell(command):
+    """Strip a `bash -lc '...'` wrapper around a command."""
+    match = re.match(r"^\s*(?:ba)?sh\s+-l?c\s", command)
+    if match is None:
+        return command
+    try:
+        parts = shlex.split(command)
+    except ValueError:
+        return command
+    return parts[2] if len(parts) > 2 else command
+
+
+def _bash_effect(command, code, output=''):
+    """
+    Work out what a bash command does to code.py.
+
+    Args:
+        command: The bash command
+        code: Contents of code.py before the command, or None if unknown
+        output: Output of the command, used to spot commands that did not run
+
+    Returns:
+        Tuple of (new code or None if unknown, whether the command may have written code.py)
+    """
+    command = _unwrap_shell(command)
+    if 'code.py' not in command:
+        return code, False
+    if re.match(r'^\s*apply_?patch\b', command) and PATCH_NOT_FOUND.search(output):
+        return code, False
+
+    heredoc = HEREDOC.match(command)
+    if heredoc:
+        head = heredoc.group('head') + heredoc.group('tail')
+        body = heredoc.group('body')
+        writes = True
+        if re.match(r'^\s*cat\s*>\s*(?:\./)?code\.py\s*$', head):
+            code = body + '\n'
+        elif re.match(r'^\s*cat\s*>>\s*(?:\./)?code\.py\s*$', head):
+            code = code + body + '\n' if code is not None else None
+        elif re.match(r'^\s*apply_?patch\s*$', head):
+            if PATCH_NOT_FOUND.search(output):
+                writes = False
+            else:
+                code = _apply_patch(code, body)
+        elif re.match(r'^\s*python3?\s+-\s*$', head):
+            written = _python_write(body, code)
+            writes = written is not None
+            code = code if written is None else (None if written is False else written)
+        elif 'code.py' in head:
+            return None, True
+        else:
+            writes = False
+        rest_code, rest_writes = _bash_effect(heredoc.group('rest') or '', code, output)
+        return rest_code, writes or rest_writes
+
+    writes = False
+    for segment in COMMAND_SEPARATOR.split(command):
+        if 'code.py' not in segment:
+            continue
+        sed = SED_SUBSTITUTE.match(segment)
+        if sed:
+            writes = True
+            code = _apply_sed(code, sed) if code is not None else None
+        elif COPY_FROM_CODE.match(segment):
+            continue
+        elif READ_ONLY_COMMAND.match(segment) and '>' not in segment and ' -i' not in segment:
+            continue
+        else:
+            return None, True
+    return code, writes
+
+
+def replay_edits(sample):
+    """
+    Replay the edits a transcript made to code.py.
+
+    Returns:
+        Tuple of (list of edits, final code or None if unknown). Each edit is a
+        dictionary with the step of the tool call, the code before and after it
+        (either may be None when unknown) and whether it was observed rather
+        than replayed.
+    """
+    code = initial_code(sample['metadata'])
+    edits = []
+    for call in tool_calls(sample):
+        before = code
+        observed = False
+        if call['function'] == 'bash':
+            output = call['output']
+            if SHELL_SYNTAX_ERROR.match(output):
+                continue
+            code, writes = _bash_effect(call['text'], code, output)
+            if CAT_CODE.match(_unwrap_shell(call['text'])) and TRUNCATED_OUTPUT not in output[:100]:
+                # A complete `cat code.py` shows the file as it is
+                observed = code != output
+                code = output
+                writes = writes or observed
+        elif call['function'] == 'python':
+            written = _python_write(call['text'], code)
+            writes = written is not None
+            code = code if written is None else (None if written is False else written)
+        else:
+            writes = False
+
+        if writes and (before != code or code is None):
+            edits.append({'step': call['step'], 'before': before, 'after': code, 'observed': observed})
+    return edits, code